@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Elshop.settings')
 
 application = get_asgi_application()
+
+# serve /products/suggest from memory from the first request on
+from products.suggest import index as suggest_index
+
+suggest_index.warm()
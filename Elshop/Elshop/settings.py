@@ -141,6 +141,24 @@ LOGOUT_REDIRECT_URL = '/'
  
 from decouple import config, Csv
 
+# Cache
+# File-based by default so web workers and management-command workers
+# (e.g. process_media_jobs) share one cache and see each other's
+# invalidations. Point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached
+# in production.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+    }
+}
+
+# Rendered invoice PDFs (see orders/utils.py). Kept out of MEDIA_ROOT so
+# they are only reachable through the login-protected download view.
+INVOICE_CACHE_DIR = config('INVOICE_CACHE_DIR', default=str(BASE_DIR / '.invoices'))
+
+
 # Email Configs
 EMAIL_BACKEND = config('EMAIL_BACKEND')
 EMAIL_HOST = config('EMAIL_HOST')
@@ -15,6 +15,8 @@ from .forms import UserRegisterForm, UserLoginForm
 
 from django.contrib.auth import login
 
+from cart import anonymous as anonymous_cart
+
 # Create your views here.
 
 class UserRegisterView(CreateView):
@@ -28,11 +30,24 @@ class UserLoginView(LoginView):
     template_name = 'authentication/login.html'
     authentication_form = UserLoginForm
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+
+        # move the cart built while logged out onto the account
+        cart = anonymous_cart.read_cart(self.request)
+        if cart:
+            anonymous_cart.merge_into_user(cart, form.get_user())
+            anonymous_cart.write_cart(response, {})
+
+        return response
+
 # Password Reset Flow
 
 import random
-from django.core.mail import send_mail
+from django.db import transaction
 from django.conf import settings
+from mainapp.models import OutboxEmail
+from mainapp.outbox import enqueue_mail
 from .models import EmailOTP
 
 def generate_otp():
@@ -44,18 +59,20 @@ def send_otp_mail(request):
         email = request.POST.get('email')
         if email:
             otp = generate_otp()
-            EmailOTP.objects.create(email = email, otp = otp)
 
-            # Prepare the email
+            # Prepare the email; queued on the HIGH lane so it goes out
+            # ahead of any bulk mail
             subject = "Your OTP Code"
             message = f"Your OTP is {otp}. It will expire in 10 minutes"
-            send_mail(
-                subject = subject,
-                message = message,
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list = [email],
-                fail_silently=False
-            )
+            with transaction.atomic():
+                EmailOTP.objects.create(email = email, otp = otp)
+                enqueue_mail(
+                    subject = subject,
+                    body = message,
+                    from_email=settings.EMAIL_HOST_USER,
+                    to = [email],
+                    priority=OutboxEmail.HIGH,
+                )
 
             request.session['email_for_reset'] = email 
             return redirect('verify_otp')
@@ -0,0 +1,147 @@
+from django.core import signing
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+
+from .cache import cart_changed
+from .models import CartItem
+from .services import OutOfStock, ZERO
+from products.models import Product
+from products.reservations import InsufficientStock, hold
+
+
+# =============================
+# ANONYMOUS CART
+# =============================
+# Visitors who are not logged in keep their cart in a signed cookie
+# ({product_id: quantity}), so adding to it costs one read of the
+# products involved and no database writes. On login the cookie is folded
+# into CartItem rows with a single bulk upsert and then cleared.
+
+COOKIE_NAME = 'anon_cart'
+SALT = 'cart.anonymous'
+MAX_AGE = 60 * 60 * 24 * 30
+# keeps the signed cookie well under the 4 KB browser limit
+MAX_LINES = 50
+
+
+class CartFull(Exception):
+    pass
+
+
+def read_cart(request):
+    """{product_id: quantity} from the cookie; empty when missing or tampered with."""
+    raw = request.COOKIES.get(COOKIE_NAME)
+    if not raw:
+        return {}
+    try:
+        data = signing.loads(raw, salt=SALT, max_age=MAX_AGE)
+        return {int(pk): int(qty) for pk, qty in data.items() if int(qty) > 0}
+    except (signing.BadSignature, AttributeError, TypeError, ValueError):
+        return {}
+
+
+def write_cart(response, cart):
+    if not cart:
+        response.delete_cookie(COOKIE_NAME)
+        return
+    value = signing.dumps({str(pk): qty for pk, qty in cart.items()}, salt=SALT, compress=True)
+    response.set_cookie(COOKIE_NAME, value, max_age=MAX_AGE, httponly=True, samesite='Lax')
+
+
+def _products(product_ids):
+    """{id: (effective_price, available stock)} in one query."""
+    return {
+        pk: (price, max(stock - reserved, 0))
+        for pk, price, stock, reserved in Product.objects.filter(pk__in=product_ids).values_list(
+            'id', 'effective_price', 'stock', 'reserved'
+        )
+    }
+
+
+def _totals(cart, products):
+    total_qty = sum(cart.values())
+    total_price = sum((qty * products[pk][0] for pk, qty in cart.items()), ZERO)
+    return total_qty, total_price
+
+
+def cart_count(cart):
+    return sum(cart.values())
+
+
+def add_item(cart, product_id):
+    """
+    Add one unit of ``product_id`` to ``cart`` in place. Returns
+    (quantity, subtotal, total_qty, total_price). Raises OutOfStock, CartFull
+    or Http404.
+    """
+    try:
+        product_id = int(product_id)
+    except (TypeError, ValueError):
+        raise Http404("No Product matches the given query.")
+
+    products = _products(set(cart) | {product_id})
+    if product_id not in products:
+        raise Http404("No Product matches the given query.")
+
+    # forget products deleted since they were added
+    for pk in [pk for pk in cart if pk not in products]:
+        del cart[pk]
+
+    # nothing is held for anonymous carts; they only see what is left
+    price, available = products[product_id]
+    quantity = cart.get(product_id, 0)
+    if quantity >= available:
+        raise OutOfStock(product_id, available)
+    if product_id not in cart and len(cart) >= MAX_LINES:
+        raise CartFull(product_id)
+
+    cart[product_id] = quantity + 1
+    total_qty, total_price = _totals(cart, products)
+    return cart[product_id], cart[product_id] * price, total_qty, total_price
+
+
+@transaction.atomic
+def merge_into_user(cart, user):
+    """
+    Add the anonymous quantities onto ``user``'s CartItem rows (capped at
+    available stock) with one bulk upsert, then hold the added units.
+    Returns the number of lines written.
+    """
+    if not cart:
+        return 0
+
+    products = _products(cart)
+    existing = dict(
+        CartItem.objects.filter(user=user, product_id__in=products).values_list('product_id', 'quantity')
+    )
+
+    now = timezone.now()
+    rows = []
+    added = {}
+    for pk, qty in cart.items():
+        if pk not in products:
+            continue
+        added[pk] = min(qty, products[pk][1])
+        if added[pk] > 0:
+            rows.append(CartItem(
+                user=user, product_id=pk, quantity=existing.get(pk, 0) + added[pk], added=now, updated=now
+            ))
+
+    CartItem.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['user', 'product'],
+        update_fields=['quantity', 'updated'],
+    )
+
+    # best effort: a unit someone else grabbed meanwhile is simply not
+    # held and gets checked again at checkout
+    for pk, quantity in added.items():
+        try:
+            hold(user, pk, quantity)
+        except InsufficientStock:
+            pass
+
+    cart_changed(user.pk)
+    return len(rows)
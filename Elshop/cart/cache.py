@@ -0,0 +1,47 @@
+from django.db import transaction
+
+from products.cache import catalog_version, next_version, read_version
+
+
+# =============================
+# CART SUMMARY CACHE
+# =============================
+# Each user's cart has a version stamp (a database counter, see
+# products/cache.py, so two concurrent mutations never share a version).
+# Every cart mutation bumps it once its transaction commits, and the
+# (count, total) summary is cached under the current version, so a stale
+# summary is never read back. The total also depends on product prices, so the
+# summary key carries the catalog version too (bumped by every Product
+# change, see products/cache.py). The cart version alone doubles as the
+# ETag of the badge endpoint, which only shows the count.
+
+SUMMARY_TIMEOUT = 60 * 60 * 24
+
+
+def version_name(user_id):
+    return f'cart:{user_id}'
+
+
+def cart_version(user_id):
+    return read_version(version_name(user_id))
+
+
+def bump_cart_version(user_id):
+    return next_version(version_name(user_id))
+
+
+def cart_changed(user_id):
+    """Call after writing CartItem rows; bumps the version after commit."""
+    transaction.on_commit(lambda: bump_cart_version(user_id))
+
+
+def summary_key(user_id, version):
+    return f'cart:summary:{user_id}:{version}:{catalog_version()}'
+
+
+def quantities_key(user_id, version):
+    return f'cart:quantities:{user_id}:{version}'
+
+
+def cart_etag(user_id):
+    return f'"cart-{user_id}-{cart_version(user_id)}"'
@@ -23,7 +23,8 @@ class CartItem(models.Model):
 
     @property
     def subtotal(self):
-        return self.quantity * self.product.offer_price
+        # same stored price the cart totals aggregate over
+        return self.quantity * self.product.effective_price
 
 
 # for 
@@ -0,0 +1,349 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, F, OuterRef, PositiveIntegerField, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Least
+from django.http import Http404
+from django.utils import timezone
+
+from .cache import SUMMARY_TIMEOUT, cart_changed, cart_version, quantities_key, summary_key
+from .models import CartItem
+from products.models import Product
+from products.reservations import InsufficientStock, hold, release
+
+
+# =============================
+# CART SUMMARY
+# =============================
+# Quantity and price totals come from one aggregate query over the stored
+# Product.effective_price column, so no CartItem or Product rows are
+# loaded into Python to compute them.
+
+ZERO = Decimal('0.00')
+
+
+def cart_items(user):
+    """Cart rows with their product joined in, ready for rendering."""
+    return CartItem.objects.filter(user=user).select_related('product').order_by('added', 'id')
+
+
+def cart_totals(user):
+    """(total quantity, total price) for ``user``'s cart in a single query."""
+    totals = CartItem.objects.filter(user=user).aggregate(
+        total_qty=Coalesce(Sum('quantity'), 0),
+        total_price=Coalesce(
+            Sum(
+                F('quantity') * F('product__effective_price'),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+            ZERO,
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+    )
+    # SQLite hands back the SUM as a float; pin it to paise
+    return totals['total_qty'], Decimal(totals['total_price']).quantize(ZERO)
+
+
+def cart_quantities(user):
+    """
+    {product_id: quantity} for the whole cart from one query on the
+    (user, product) index, cached per cart version like the totals.
+    """
+    key = quantities_key(user.pk, cart_version(user.pk))
+    quantities = cache.get(key)
+    if quantities is None:
+        quantities = dict(CartItem.objects.filter(user=user).values_list('product_id', 'quantity'))
+        cache.set(key, quantities, SUMMARY_TIMEOUT)
+    return quantities
+
+
+def cached_cart_totals(user):
+    """cart_totals() computed once per cart version, see cart/cache.py."""
+    key = summary_key(user.pk, cart_version(user.pk))
+    totals = cache.get(key)
+    if totals is None:
+        totals = cart_totals(user)
+        cache.set(key, totals, SUMMARY_TIMEOUT)
+    return totals
+
+
+# =============================
+# QUANTITY MUTATIONS
+# =============================
+# Quantities change through conditional UPDATEs evaluated by the database
+# (quantity = quantity + 1 WHERE quantity < stock), never by reading the
+# row into Python and saving it back. Two clicks landing at once can no
+# longer overwrite each other, and the cart can never hold more than the
+# product's stock, without taking row locks. Every mutation bumps the
+# cart version (cart/cache.py) so cached summaries are retired.
+#
+# Units entering the cart are also held for the user (see
+# products/reservations.py) in the same transaction, and given back as
+# they leave, so what other shoppers can add is stock minus those holds.
+
+class OutOfStock(Exception):
+    def __init__(self, product_id, stock):
+        super().__init__(product_id, stock)
+        self.product_id = product_id
+        self.stock = stock
+
+
+def _stock():
+    return Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('stock')[:1])
+
+
+def _line(user, product_id):
+    """(quantity, subtotal) of one cart line after a mutation; (0, 0) once it is gone."""
+    row = CartItem.objects.filter(user=user, product_id=product_id).values_list(
+        'quantity', 'product__effective_price'
+    ).first()
+    if row is None:
+        return 0, 0
+    quantity, price = row
+    return quantity, quantity * price
+
+
+def _refuse(product_id):
+    """Raise the right error once a conditional update or hold failed."""
+    row = Product.objects.filter(pk=product_id).values_list('stock', 'reserved').first()
+    if row is None:
+        raise Http404("No Product matches the given query.")
+    raise OutOfStock(product_id, max(row[0] - row[1], 0))
+
+
+def _hold_one(user, product_id):
+    try:
+        hold(user, product_id)
+    except InsufficientStock:
+        _refuse(product_id)
+
+
+def _increment(user, product_id):
+    return CartItem.objects.filter(
+        user=user,
+        product_id=product_id,
+        quantity__lt=_stock(),
+    ).update(quantity=F('quantity') + 1, updated=timezone.now())
+
+
+def _insert(user, product_id, quantity):
+    """Create the line; False if a concurrent request created it first."""
+    try:
+        with transaction.atomic():
+            CartItem.objects.create(user=user, product_id=product_id, quantity=quantity)
+    except IntegrityError:
+        return False
+    return True
+
+
+@transaction.atomic
+def add_item(user, product_id):
+    """Add one unit, creating the line if needed. Raises OutOfStock or Http404."""
+    _hold_one(user, product_id)
+    if not _increment(user, product_id):
+        if not _insert(user, product_id, 1) and not _increment(user, product_id):
+            _refuse(product_id)
+    cart_changed(user.pk)
+    return _line(user, product_id)
+
+
+@transaction.atomic
+def increase_item(user, product_id):
+    """Add one unit to an existing line. Raises OutOfStock or Http404."""
+    if not CartItem.objects.filter(user=user, product_id=product_id).exists():
+        raise Http404("No CartItem matches the given query.")
+    _hold_one(user, product_id)
+    if not _increment(user, product_id):
+        _refuse(product_id)
+    cart_changed(user.pk)
+    return _line(user, product_id)
+
+
+@transaction.atomic
+def decrease_item(user, product_id):
+    """Take one unit off a line, deleting it at zero. Raises Http404 if absent."""
+    lines = CartItem.objects.filter(user=user, product_id=product_id)
+    if not lines.filter(quantity__gt=1).update(
+        quantity=F('quantity') - 1, updated=timezone.now()
+    ):
+        deleted, _ = lines.filter(quantity__lte=1).delete()
+        if not deleted:
+            raise Http404("No CartItem matches the given query.")
+        release(user, product_id)
+        cart_changed(user.pk)
+        return 0, 0
+    release(user, product_id, 1)
+    cart_changed(user.pk)
+    return _line(user, product_id)
+
+
+@transaction.atomic
+def remove_item(user, product_id):
+    CartItem.objects.filter(user=user, product_id=product_id).delete()
+    release(user, product_id)
+    cart_changed(user.pk)
+
+
+# =============================
+# BATCHED MUTATIONS
+# =============================
+# The cart page queues +/- clicks and sends them as one list of operations:
+#
+#   {"product_id": 3, "op": "add", "quantity": -2}
+#   {"product_id": 5, "op": "set", "quantity": 4}
+#   {"product_id": 7, "op": "remove"}
+#
+# They run in one transaction with the same conditional UPDATEs as the
+# single-item endpoints; quantities above the stock are clamped to it.
+
+MAX_BATCH_OPS = 100
+BATCH_OPS = ('set', 'add', 'remove')
+# PositiveIntegerField's range; quantities are clamped to stock anyway
+MAX_QUANTITY = 2147483647
+
+
+class InvalidBatch(ValueError):
+    pass
+
+
+def parse_batch(ops):
+    """Validate raw JSON operations into (op, product_id, quantity) tuples."""
+    if not isinstance(ops, list) or not ops:
+        raise InvalidBatch("ops must be a non-empty list")
+    if len(ops) > MAX_BATCH_OPS:
+        raise InvalidBatch(f"at most {MAX_BATCH_OPS} operations per batch")
+
+    parsed = []
+    for raw in ops:
+        if not isinstance(raw, dict) or raw.get('op') not in BATCH_OPS:
+            raise InvalidBatch(f"op must be one of {', '.join(BATCH_OPS)}")
+        try:
+            product_id = int(raw.get('product_id'))
+            quantity = int(raw.get('quantity', 0))
+        except (TypeError, ValueError, OverflowError):
+            raise InvalidBatch("product_id and quantity must be integers")
+        if not 0 < product_id <= MAX_QUANTITY:
+            raise InvalidBatch("product_id is out of range")
+        if abs(quantity) > MAX_QUANTITY:
+            raise InvalidBatch(f"quantity must be at most {MAX_QUANTITY}")
+        if raw['op'] == 'set' and quantity < 0:
+            raise InvalidBatch("set quantity cannot be negative")
+        parsed.append((raw['op'], product_id, quantity))
+    return parsed
+
+
+def _clamped(quantity):
+    return Least(quantity, _stock(), output_field=PositiveIntegerField())
+
+
+def _set(user, product_id, quantity, stock):
+    lines = CartItem.objects.filter(user=user, product_id=product_id)
+    if quantity <= 0:
+        lines.delete()
+        return
+
+    def update():
+        return lines.update(quantity=_clamped(Value(quantity)), updated=timezone.now())
+
+    if not update() and stock and not _insert(user, product_id, min(quantity, stock)):
+        update()
+
+
+def _add(user, product_id, delta, stock):
+    lines = CartItem.objects.filter(user=user, product_id=product_id)
+    if delta > 0:
+        def update():
+            return lines.update(quantity=_clamped(F('quantity') + delta), updated=timezone.now())
+
+        if not update() and stock and not _insert(user, product_id, min(delta, stock)):
+            update()
+    elif delta < 0:
+        if not lines.filter(quantity__gt=-delta).update(
+            quantity=F('quantity') + delta, updated=timezone.now()
+        ):
+            lines.delete()
+
+
+@transaction.atomic
+def apply_batch(user, ops):
+    """
+    Apply parsed operations and return the final state of every product
+    they touched: [{'product_id', 'quantity', 'subtotal', 'stock', 'limited'}, ...].
+    """
+    product_ids = {product_id for _, product_id, _ in ops}
+    stocks = dict(Product.objects.filter(pk__in=product_ids).values_list('id', 'stock'))
+    missing = product_ids - stocks.keys()
+    if missing:
+        raise InvalidBatch(f"unknown product_id {min(missing)}")
+
+    before = dict(
+        CartItem.objects.filter(user=user, product_id__in=product_ids).values_list('product_id', 'quantity')
+    )
+
+    for op, product_id, quantity in ops:
+        if op == 'set':
+            _set(user, product_id, quantity, stocks[product_id])
+        elif op == 'add':
+            _add(user, product_id, quantity, stocks[product_id])
+        else:
+            CartItem.objects.filter(user=user, product_id=product_id).delete()
+
+    # clamping to a stock of zero leaves empty lines behind
+    CartItem.objects.filter(user=user, product_id__in=product_ids, quantity=0).delete()
+
+    after = dict(
+        CartItem.objects.filter(user=user, product_id__in=product_ids).values_list('product_id', 'quantity')
+    )
+    _sync_holds(user, before, after)
+    cart_changed(user.pk)
+
+    # what the client asked for, to flag lines that were cut short
+    wanted = dict(before)
+    for op, product_id, quantity in ops:
+        if op == 'set':
+            wanted[product_id] = quantity
+        elif op == 'add':
+            wanted[product_id] = max(wanted.get(product_id, 0) + quantity, 0)
+        else:
+            wanted[product_id] = 0
+
+    prices = dict(Product.objects.filter(pk__in=after).values_list('id', 'effective_price'))
+    return [
+        {
+            'product_id': product_id,
+            'quantity': after.get(product_id, 0),
+            'subtotal': after.get(product_id, 0) * prices.get(product_id, 0),
+            'stock': stocks[product_id],
+            'limited': after.get(product_id, 0) < wanted.get(product_id, 0),
+        }
+        for product_id in sorted(product_ids)
+    ]
+
+
+def _sync_holds(user, before, after):
+    """
+    Hold or release the difference each line moved by. A line whose extra
+    units cannot all be held is cut back to what could be (updates ``after``).
+    """
+    for product_id in sorted(set(before) | set(after)):
+        old, new = before.get(product_id, 0), after.get(product_id, 0)
+        if new > old:
+            try:
+                hold(user, product_id, new - old)
+            except InsufficientStock as e:
+                # settle for whatever can still be held
+                granted = min(e.available, new - old)
+                try:
+                    hold(user, product_id, granted)
+                except InsufficientStock:
+                    granted = 0
+                lines = CartItem.objects.filter(user=user, product_id=product_id)
+                if old + granted:
+                    lines.update(quantity=old + granted, updated=timezone.now())
+                    after[product_id] = old + granted
+                else:
+                    lines.delete()
+                    after.pop(product_id)
+        elif new < old:
+            release(user, product_id, None if new == 0 else old - new)
@@ -1,24 +1,33 @@
-from django.shortcuts import render, get_object_or_404
+import json
+
+from django.shortcuts import render
 from django.views import View
 from django.http import JsonResponse
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
-from .models import CartItem
-from products.models import Product
+from .services import cart_items, cached_cart_totals, cart_quantities
+from .services import OutOfStock, add_item, increase_item, decrease_item, remove_item
+from .services import InvalidBatch, apply_batch, parse_batch
+from . import anonymous
+from .cache import cart_etag
 
 
 # =============================
-# HELPER — totals calculator
+# OUT OF STOCK
 # =============================
+# 409 with the stock the request ran into, so the page can disable the
+# button instead of showing a generic error.
 
-def cart_totals(user):
-    items = CartItem.objects.filter(user=user)
-
-    total_qty = sum(i.quantity for i in items)
-    total_price = sum(i.subtotal for i in items)
-
-    return total_qty, total_price
+def out_of_stock_response(error):
+    return JsonResponse({
+        'error': 'out_of_stock',
+        'product_id': error.product_id,
+        'stock': error.stock,
+        'message': f"Only {error.stock} left in stock" if error.stock else "Out of stock"
+    }, status=409)
 
 
 # =============================
@@ -28,34 +37,53 @@ def cart_totals(user):
 class AddToCart(View):
     def post(self, request, *args, **kwargs):
 
-        if not request.user.is_authenticated:
-            return JsonResponse({
-                'error': 'login_required',
-                'redirect_url': reverse('signin')
-            }, status=401)
-
         product_id = request.POST.get('product_id')
-        product = get_object_or_404(Product, id=product_id)
 
-        item, created = CartItem.objects.get_or_create(
-            user=request.user,
-            product=product
-        )
+        if not request.user.is_authenticated:
+            return self.add_anonymous(request, product_id)
 
-        item.quantity += 1
-        item.save()
+        try:
+            qty, subtotal = add_item(request.user, product_id)
+        except OutOfStock as e:
+            return out_of_stock_response(e)
 
-        total_qty, total_price = cart_totals(request.user)
+        total_qty, total_price = cached_cart_totals(request.user)
 
         return JsonResponse({
-            "product_id": product.id,
-            "qty": item.quantity,
-            "subtotal": item.subtotal,
+            "product_id": product_id,
+            "qty": qty,
+            "subtotal": subtotal,
+            "cart_count": total_qty,
+            "total_qty": total_qty,
+            "total_price": total_price,
+            "message": "Added to cart"
+        })
+
+    def add_anonymous(self, request, product_id):
+        # kept in a signed cookie until login, see cart/anonymous.py
+        cart = anonymous.read_cart(request)
+
+        try:
+            qty, subtotal, total_qty, total_price = anonymous.add_item(cart, product_id)
+        except OutOfStock as e:
+            return out_of_stock_response(e)
+        except anonymous.CartFull:
+            return JsonResponse({
+                'error': 'login_required',
+                'redirect_url': reverse('signin')
+            }, status=401)
+
+        response = JsonResponse({
+            "product_id": product_id,
+            "qty": qty,
+            "subtotal": subtotal,
             "cart_count": total_qty,
             "total_qty": total_qty,
             "total_price": total_price,
-            "message": f"{product.title} added to cart"
+            "message": "Added to cart"
         })
+        anonymous.write_cart(response, cart)
+        return response
 
 
 # =============================
@@ -73,21 +101,17 @@ class IncreaseCartItem(View):
 
         product_id = request.POST.get('product_id')
 
-        item = get_object_or_404(
-            CartItem,
-            user=request.user,
-            product_id=product_id
-        )
+        try:
+            qty, subtotal = increase_item(request.user, product_id)
+        except OutOfStock as e:
+            return out_of_stock_response(e)
 
-        item.quantity += 1
-        item.save()
-
-        total_qty, total_price = cart_totals(request.user)
+        total_qty, total_price = cached_cart_totals(request.user)
 
         return JsonResponse({
             "product_id": product_id,
-            "quantity": item.quantity,
-            "subtotal": item.subtotal,
+            "quantity": qty,
+            "subtotal": subtotal,
             "cart_count": total_qty,
             "total_qty": total_qty,
             "total_price": total_price
@@ -109,24 +133,9 @@ class DecreaseCartItem(View):
 
         product_id = request.POST.get('product_id')
 
-        item = get_object_or_404(
-            CartItem,
-            user=request.user,
-            product_id=product_id
-        )
-
-        item.quantity -= 1
+        qty, subtotal = decrease_item(request.user, product_id)
 
-        if item.quantity <= 0:
-            item.delete()
-            qty = 0
-            subtotal = 0
-        else:
-            item.save()
-            qty = item.quantity
-            subtotal = item.subtotal
-
-        total_qty, total_price = cart_totals(request.user)
+        total_qty, total_price = cached_cart_totals(request.user)
 
         deleted = qty == 0
 
@@ -156,12 +165,9 @@ class RemoveCartItem(View):
 
         product_id = request.POST.get('product_id')
 
-        CartItem.objects.filter(
-            user=request.user,
-            product_id=product_id
-        ).delete()
+        remove_item(request.user, product_id)
 
-        total_qty, total_price = cart_totals(request.user)
+        total_qty, total_price = cached_cart_totals(request.user)
 
         return JsonResponse({
             "product_id": product_id,
@@ -173,19 +179,57 @@ class RemoveCartItem(View):
         })
 
 
+# =============================
+# BATCHED UPDATES
+# =============================
+# Body: {"ops": [{"product_id": 3, "op": "add", "quantity": 2}, ...]}
+# All operations apply in one transaction; the response carries the final
+# quantity of every product touched plus the cart totals.
+
+class BatchCartUpdate(View):
+    def post(self, request, *args, **kwargs):
+
+        if not request.user.is_authenticated:
+            return JsonResponse({
+                'error': 'login_required',
+                'redirect_url': reverse('signin')
+            }, status=401)
+
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            payload = None
+
+        try:
+            ops = parse_batch(payload.get('ops') if isinstance(payload, dict) else None)
+            items = apply_batch(request.user, ops)
+        except InvalidBatch as e:
+            return JsonResponse({
+                'error': 'invalid_batch',
+                'message': str(e)
+            }, status=400)
+
+        total_qty, total_price = cached_cart_totals(request.user)
+
+        return JsonResponse({
+            "items": items,
+            "cart_count": total_qty,
+            "total_qty": total_qty,
+            "total_price": total_price
+        })
+
+
 # =============================
 # CART PAGE VIEW
 # =============================
 
 @login_required
 def view_cart(request):
-    cart_items = CartItem.objects.filter(user=request.user)
-
-    total_quantity = sum(item.quantity for item in cart_items)
-    total_price = sum(item.subtotal for item in cart_items)
+    items = cart_items(request.user)
+    total_quantity, total_price = cached_cart_totals(request.user)
 
     context = {
-        "cart_items": cart_items,
+        "cart_items": items,
         "total_quantity": total_quantity,
         "total_price": total_price,
     }
@@ -196,13 +240,23 @@ def view_cart(request):
 # =============================
 # CART BADGE COUNT
 # =============================
+# Polled on every page load. The ETag is the cart version, so a repeat
+# poll with an unchanged cart is answered 304 from the cache alone.
+
+def cart_count_etag(request):
+    if not request.user.is_authenticated:
+        return None
+    return cart_etag(request.user.pk)
 
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=cart_count_etag)
 def get_cart_item_count(request):
 
     if not request.user.is_authenticated:
-        return JsonResponse({'cart_count': 0})
+        return JsonResponse({'cart_count': anonymous.cart_count(anonymous.read_cart(request))})
 
-    total_qty, _ = cart_totals(request.user)
+    total_qty, _ = cached_cart_totals(request.user)
 
     return JsonResponse({
         'cart_count': total_qty
@@ -210,25 +264,33 @@ def get_cart_item_count(request):
 
 
 # =============================
-# GET ITEM QTY (for detail page hydration)
+# ITEM QUANTITIES (listing / detail page hydration)
 # =============================
+# GET ?ids=3,5,8 -> {"items": {"3": 2, "8": 1}}; products not in the cart
+# are left out. Without ids the whole cart is returned.
 
-class GetCartItemQty(View):
-    def get(self, request, *args, **kwargs):
+MAX_HYDRATE_IDS = 200
 
-        if not request.user.is_authenticated:
-            return JsonResponse({"qty": 0})
 
-        product_id = request.GET.get("product_id")
+def parse_ids(raw):
+    ids = set()
+    for part in (raw or '').split(',')[:MAX_HYDRATE_IDS]:
+        if part.strip().isdigit():
+            ids.add(int(part))
+    return ids
 
-        item = CartItem.objects.filter(
-            user=request.user,
-            product_id=product_id
-        ).first()
 
-        qty = item.quantity if item else 0
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=cart_count_etag)
+def get_cart_item_quantities(request):
 
-        return JsonResponse({
-            "product_id": product_id,
-            "qty": qty
-        })
+    if request.user.is_authenticated:
+        quantities = cart_quantities(request.user)
+    else:
+        quantities = anonymous.read_cart(request)
+
+    ids = parse_ids(request.GET.get('ids'))
+    if ids:
+        quantities = {pk: qty for pk, qty in quantities.items() if pk in ids}
+
+    return JsonResponse({"items": quantities})
@@ -1,7 +1,19 @@
 from django.contrib import admin
 
 
-from .models import CarouselImage
+from .models import CarouselImage, OutboxEmail
 # Register your models here.
 
 admin.site.register(CarouselImage)
+
+
+# =========================
+# EMAIL OUTBOX ADMIN
+# =========================
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'priority', 'status', 'attempts', 'created_at', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'priority')
+    search_fields = ('subject',)
+    # queue state belongs to the worker; attachments are never edited by hand
+    readonly_fields = ('status', 'attempts', 'attachments', 'error')
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mainapp.models import OutboxEmail
+from mainapp.outbox import SEND_BATCH, claim_batch, requeue_stale, send_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox, one SMTP connection per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=SEND_BATCH,
+            help=f"Emails sent per SMTP connection (default: {SEND_BATCH}).",
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help="Seconds to sleep when nothing is due.",
+        )
+        parser.add_argument(
+            '--high-only', action='store_true',
+            help="Only send HIGH priority mail (OTPs), e.g. for a dedicated worker.",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit when nothing is due instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        batch = max(options['batch'], 1)
+        max_priority = OutboxEmail.HIGH if options['high_only'] else OutboxEmail.NORMAL
+
+        while True:
+            # every round, so mail claimed by a worker that crashed
+            # meanwhile is sent without a restart
+            requeued = requeue_stale()
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale emails.")
+
+            # claimed again after every batch, so new HIGH mail never waits
+            # behind more than one batch of NORMAL mail
+            emails = claim_batch(batch, max_priority=max_priority)
+
+            if not emails:
+                if options['once']:
+                    break
+                time.sleep(options['poll'])
+                continue
+
+            sent = send_batch(emails)
+            self.stdout.write(f"Sent {sent} of {len(emails)} emails.")
+
+        self.stdout.write(self.style.SUCCESS("Outbox drained."))
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from products.models import Product
 
 # Create your models here.
@@ -8,7 +9,60 @@ class CarouselImage(models.Model):
     caption = models.TextField(max_length=400)
     link = models.CharField(max_length=200)
     active = models.BooleanField(default=True)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     
     def __str__(self):
         return f"carousel Image : {self.title}"
 
+
+
+# =========================
+# EMAIL OUTBOX
+# =========================
+class OutboxEmail(models.Model):
+    """
+    Email waiting to be sent. Rows are written in the same transaction as
+    the change that triggers them and delivered by `manage.py send_outbox`.
+    """
+    HIGH = 0
+    NORMAL = 1
+    PRIORITY_CHOICES = [
+        (HIGH, 'High'),
+        (NORMAL, 'Normal'),
+    ]
+
+    PENDING = 'PENDING'
+    SENDING = 'SENDING'
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    # [{"filename", "mimetype", "content" (base64)}] or, for files built at
+    # send time, [{"filename", "mimetype", "source": "dotted.path", "args": [...]}]
+    attachments = models.JSONField(default=list, blank=True)
+
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, default=NORMAL)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'priority', 'next_attempt_at', 'id'], name='outbox_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
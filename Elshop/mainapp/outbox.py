@@ -0,0 +1,168 @@
+import base64
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+# =========================
+# EMAIL OUTBOX
+# =========================
+# Views never talk to SMTP. They add an OutboxEmail row inside their own
+# transaction, so the mail exists exactly when the change that caused it
+# commits, and `manage.py send_outbox` delivers batches of rows over one
+# SMTP connection. HIGH priority rows (OTPs) are always claimed before
+# NORMAL ones; failed sends are retried with exponential backoff.
+
+MAX_ATTEMPTS = 5
+RETRY_BASE = timedelta(seconds=30)
+RETRY_MAX = timedelta(hours=1)
+STALE_AFTER = timedelta(minutes=10)
+SEND_BATCH = 50
+
+
+def _order_invoice(order_id):
+    # orders imports this module, so its builder is looked up at send time
+    from orders.utils import order_invoice_pdf
+
+    return order_invoice_pdf(order_id)
+
+
+# Attachments built at send time name one of these; the outbox table never
+# decides what code runs.
+ATTACHMENT_BUILDERS = {
+    'order_invoice': _order_invoice,
+}
+
+
+def enqueue_mail(subject, body, to, from_email=None, priority=OutboxEmail.NORMAL, attachments=()):
+    """
+    Queue an email. ``attachments`` holds (filename, content, mimetype)
+    tuples, or dicts with "filename", "mimetype", "builder" (a key of
+    ATTACHMENT_BUILDERS) and "args" to build the file at send time.
+    """
+    specs = []
+    for attachment in attachments:
+        if isinstance(attachment, dict):
+            specs.append(attachment)
+        else:
+            filename, content, mimetype = attachment
+            specs.append({
+                'filename': filename,
+                'mimetype': mimetype,
+                'content': base64.b64encode(content).decode(),
+            })
+
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        attachments=specs,
+        priority=priority,
+    )
+
+
+def claim_batch(limit=SEND_BATCH, max_priority=OutboxEmail.NORMAL):
+    """Mark up to ``limit`` due rows SENDING, highest priority first, and return them."""
+    now = timezone.now()
+    candidates = (
+        OutboxEmail.objects.filter(status=OutboxEmail.PENDING, priority__lte=max_priority, next_attempt_at__lte=now)
+        .order_by('priority', 'next_attempt_at', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+
+    # each row is claimed with a conditional UPDATE, so when several
+    # workers pick the same candidates every row is won by exactly one
+    claimed = []
+    for email_id in list(candidates):
+        updated = OutboxEmail.objects.filter(pk=email_id, status=OutboxEmail.PENDING).update(
+            status=OutboxEmail.SENDING,
+            next_attempt_at=now,
+        )
+        if updated:
+            claimed.append(email_id)
+
+    return list(OutboxEmail.objects.filter(pk__in=claimed).order_by('priority', 'id'))
+
+
+def requeue_stale():
+    """Rows left SENDING by a crashed worker go back to the queue."""
+    return OutboxEmail.objects.filter(
+        status=OutboxEmail.SENDING,
+        next_attempt_at__lt=timezone.now() - STALE_AFTER,
+    ).update(status=OutboxEmail.PENDING)
+
+
+def retry_delay(attempts):
+    return min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+
+
+def build_message(email, connection=None):
+    message = EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        connection=connection,
+    )
+    for spec in email.attachments:
+        if 'builder' in spec:
+            builder = ATTACHMENT_BUILDERS.get(spec['builder'])
+            if builder is None:
+                raise ValueError(f"Unknown attachment builder {spec['builder']!r}.")
+            content = builder(*spec.get('args', ()))
+        else:
+            content = base64.b64decode(spec['content'])
+        message.attach(spec['filename'], content, spec['mimetype'])
+    return message
+
+
+def _failed(email, now):
+    email.attempts += 1
+    email.error = traceback.format_exc()
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = OutboxEmail.FAILED
+    else:
+        email.status = OutboxEmail.PENDING
+        email.next_attempt_at = now + retry_delay(email.attempts)
+    email.save(update_fields=['attempts', 'error', 'status', 'next_attempt_at'])
+
+
+def send_batch(emails):
+    """Deliver claimed rows over a single SMTP connection. Returns the number sent."""
+    if not emails:
+        return 0
+
+    sent = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception:
+        now = timezone.now()
+        for email in emails:
+            _failed(email, now)
+        return 0
+
+    try:
+        for email in emails:
+            try:
+                connection.send_messages([build_message(email, connection)])
+            except Exception:
+                _failed(email, timezone.now())
+                continue
+
+            email.attempts += 1
+            email.status = OutboxEmail.SENT
+            email.error = ''
+            email.sent_at = timezone.now()
+            email.save(update_fields=['attempts', 'status', 'error', 'sent_at'])
+            sent += 1
+    finally:
+        connection.close()
+
+    return sent
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from products.renditions import delete_renditions
+from products.jobs import enqueue_renditions
+from .models import CarouselImage
+
+
+@receiver(post_save, sender=CarouselImage)
+def render_carousel_image(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    enqueue_renditions(instance, 'img')
+
+
+@receiver(post_delete, sender=CarouselImage)
+def delete_carousel_renditions(sender, instance, **kwargs):
+    delete_renditions(instance.renditions or {}, instance.img.storage)
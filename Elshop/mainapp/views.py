@@ -3,7 +3,7 @@ from django.shortcuts import render
 
 
 from .models import CarouselImage
-from products.models import Product
+from products.views import product_listing
 
 # Create your views here.
 
@@ -12,9 +12,8 @@ def homeView(request):
     context = {
         'current_page' : 'home',
         'carousel_images': CarouselImage.objects.all(),
-        
-        'products' : Product.objects.all()
     }
+    context.update(product_listing(request))
     
     return render(request, template_name=template, context=context)
 
@@ -27,10 +26,12 @@ def aboutView(request):
     return render(request, template, context)
 
 from django.shortcuts import render, redirect
-from django.core.mail import send_mail
+from django.db import transaction
 from django.conf import settings
 from django.contrib import messages
 
+from .outbox import enqueue_mail
+
 def contactView(request):
     if request.method == "POST":
         name = request.POST.get("name")
@@ -38,28 +39,26 @@ def contactView(request):
         subject = request.POST.get("subject", "Contact Form")
         message = request.POST.get("message")
 
-        # Email to Admin
-        send_mail(
-            subject=f"Contact: {subject}",
-            message=f"From: {name} ({email})\n\n{message}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[settings.ADMIN_EMAIL],
-            fail_silently=False,
-        )
+        # queued; `manage.py send_outbox` delivers them
+        with transaction.atomic():
+            # Email to Admin
+            enqueue_mail(
+                subject=f"Contact: {subject}",
+                body=f"From: {name} ({email})\n\n{message}",
+                to=[settings.ADMIN_EMAIL],
+            )
 
-        # Auto-reply to User
-        send_mail(
-            subject="We received your message – PlayZoneX 🎮",
-            message=(
-                f"Hi {name},\n\n"
-                "Thanks for contacting PlayZoneX.\n"
-                "Our support team will get back to you shortly.\n\n"
-                "— PlayZoneX Support Team"
-            ),
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-            fail_silently=False,
-        )
+            # Auto-reply to User
+            enqueue_mail(
+                subject="We received your message – PlayZoneX 🎮",
+                body=(
+                    f"Hi {name},\n\n"
+                    "Thanks for contacting PlayZoneX.\n"
+                    "Our support team will get back to you shortly.\n\n"
+                    "— PlayZoneX Support Team"
+                ),
+                to=[email],
+            )
 
         messages.success(request, "Your message has been sent successfully!")
         return redirect("contact_page")
@@ -1,15 +1,12 @@
-from django.core.mail import EmailMessage
-from django.conf import settings
+from mainapp.outbox import enqueue_mail
 
 class OrderSuccessEmail:
     def __init__(self, order):
         self.order = order
 
     def send(self):
-        email = EmailMessage(
+        return enqueue_mail(
             subject=f"Order Confirmed - #{self.order.id}",
             body=f"Your order total is ₹{self.order.total_amount}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
             to=[self.order.user.email]
         )
-        email.send()
@@ -0,0 +1,193 @@
+import csv
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta
+
+from django.apps import apps
+from django.contrib import admin
+from django.db import connections
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Order
+from .utils import invoice_pdf_bytes
+
+
+# =============================
+# BULK INVOICE EXPORT
+# =============================
+# Invoices are rendered in a process pool, CHUNK_SIZE orders per task
+# (three queries per chunk), and written into a ZIP as they come back.
+# Only two tasks per worker are in flight at a time and the archive goes to
+# an unseekable stream that hands out bytes as soon as they are produced,
+# so memory stays flat however many orders are exported. Rendering goes
+# through the invoice cache, so invoices that were already downloaded
+# are only read from disk.
+#
+# Month-sized exports belong to `manage.py export_invoices`. The admin
+# action runs inside a web worker, so it forks at most ADMIN_WORKERS
+# processes and is meant for a page of selected orders.
+
+CHUNK_SIZE = 50
+ADMIN_WORKERS = 2
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def init_worker():
+    import django
+
+    # "spawn" start method: the child has to set Django up itself
+    if not apps.ready:
+        django.setup()
+    # "fork" start method: never share the parent's DB connection
+    connections.close_all()
+
+
+def orders_between(start, end):
+    """Completed orders placed from ``start`` to ``end`` (dates, both inclusive)."""
+    tz = timezone.get_current_timezone()
+    return Order.objects.filter(
+        # unpaid and cancelled orders get no invoice
+        status=Order.COMPLETED,
+        order_date__gte=timezone.make_aware(datetime.combine(start, time.min), tz),
+        order_date__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def invoice_name(order_id):
+    return f"invoice_order_{order_id}.pdf"
+
+
+def render_chunk(order_ids):
+    """[(order_id, order_date, pdf bytes)] for a chunk of orders. Runs in a worker process."""
+    orders = (
+        Order.objects.filter(pk__in=order_ids)
+        .select_related('user', 'address')
+        .prefetch_related('order_details__order_item')
+        .order_by('id')
+    )
+    return [(order.id, order.order_date, invoice_pdf_bytes(order)) for order in orders]
+
+
+def _chunks(order_ids, size):
+    chunk = []
+    for order_id in order_ids:
+        chunk.append(order_id)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _bounded_map(pool, fn, items, window):
+    """pool.map() that keeps at most ``window`` tasks submitted at once."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class _Stream:
+    """Write-only file for ZipFile; collects bytes until drained."""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_invoice_zip(queryset, workers=None, chunk_size=CHUNK_SIZE):
+    """Yield the bytes of a ZIP holding the invoice of every order in ``queryset``."""
+    workers = max(workers or default_workers(), 1)
+    order_ids = queryset.order_by('id').values_list('id', flat=True).iterator(chunk_size=2000)
+
+    stream = _Stream()
+    # fork the workers before the parent opens the cursor over the ids, so
+    # no child inherits a live connection
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        pool.submit(int).result()
+        with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            chunks = _chunks(order_ids, chunk_size)
+            for rendered in _bounded_map(pool, render_chunk, chunks, window=workers * 2):
+                for order_id, order_date, pdf in rendered:
+                    local = timezone.localtime(order_date) if timezone.is_aware(order_date) else order_date
+                    info = zipfile.ZipInfo(invoice_name(order_id), local.timetuple()[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    archive.writestr(info, pdf)
+                yield stream.drain()
+        # central directory, written on close
+        yield stream.drain()
+
+
+# =============================
+# CSV EXPORT (ADMIN)
+# =============================
+# Admin actions stream their queryset as CSV: one values_list() query
+# (related columns come from the same joined SELECT) read with
+# iterator(), each row formatted and sent as soon as it is read. The
+# header goes out first, so the download starts before the first chunk
+# of rows arrives. Text cells that a spreadsheet would read as a formula
+# (usernames, titles, failure reasons are user input) get a leading quote.
+
+CSV_CHUNK_SIZE = 2000
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class _Echo:
+    """csv.writer target that hands each formatted line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def _cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(queryset, columns, chunk_size=CSV_CHUNK_SIZE):
+    """Yield CSV lines for ``queryset``; ``columns`` is [(header, field path)]."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow([header for header, _ in columns])
+
+    rows = queryset.values_list(*[path for _, path in columns]).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield writer.writerow([_cell(value) for value in row])
+
+
+def csv_export_action(columns, name):
+    """Admin action exporting the selected rows as ``<name>_<date>.csv``."""
+    @admin.action(description="Export selected rows to CSV", permissions=['view'])
+    def export_csv(modeladmin, request, queryset):
+        response = StreamingHttpResponse(stream_csv(queryset, columns), content_type='text/csv')
+        filename = f"{name}_{timezone.localdate():%Y%m%d}.csv"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    return export_csv
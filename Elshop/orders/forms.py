@@ -46,8 +46,8 @@ class AddressForm(forms.ModelForm):
 class OrderForm(forms.ModelForm):
     class Meta:
         model = Order
-        fields = ["address", "status"]
+        # status changes go through orders.lifecycle
+        fields = ["address"]
         widgets = {
             "address": forms.Select(attrs={"class": "form-control"}),
-            "status": forms.Select(attrs={"class": "form-control"}),
         }
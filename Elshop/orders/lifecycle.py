@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Order
+
+
+# =============================
+# ORDER LIFECYCLE
+# =============================
+# Order.status only changes through transition(). The status is moved
+# with a conditional UPDATE (WHERE status = <from>), so when two requests
+# race (e.g. a retried payment callback) exactly one of them wins, and
+# only the winner runs the hooks of that transition. Hooks registered
+# with on_commit=True run once the transaction commits; the others run
+# inside it, for work that has to commit or roll back with the status.
+# Plain saves of an order (address, admin edits) never fire any hook.
+
+TRANSITIONS = {
+    Order.PENDING: {Order.COMPLETED, Order.CANCELLED},
+    Order.COMPLETED: set(),
+    Order.CANCELLED: set(),
+}
+
+_hooks = defaultdict(list)
+
+
+class InvalidTransition(Exception):
+    def __init__(self, order_id, source, target):
+        super().__init__(f"Order #{order_id} cannot go from {source} to {target}.")
+        self.order_id = order_id
+        self.source = source
+        self.target = target
+
+
+def on_transition(target, on_commit=True):
+    """Register ``hook(order, source)`` to run when an order enters ``target``."""
+    def register(hook):
+        _hooks[target].append((hook, on_commit))
+        return hook
+    return register
+
+
+def can_transition(order, target):
+    return target in TRANSITIONS.get(order.status, ())
+
+
+@transaction.atomic
+def transition(order, target):
+    """
+    Move ``order`` to ``target`` and run its hooks. Returns False, doing
+    nothing, when the order is already in ``target``; raises
+    InvalidTransition when the move is not allowed from its current status.
+    """
+    source = order.status
+    if source == target:
+        return False
+    if not can_transition(order, target):
+        raise InvalidTransition(order.pk, source, target)
+
+    moved = Order.objects.filter(pk=order.pk, status=source).update(status=target)
+    if not moved:
+        # someone else moved it first; see where it went
+        current = Order.objects.filter(pk=order.pk).values_list('status', flat=True).first()
+        order.status = current
+        if current == target:
+            return False
+        raise InvalidTransition(order.pk, current, target)
+
+    order.status = target
+    for hook, deferred in _hooks[target]:
+        if deferred:
+            transaction.on_commit(lambda hook=hook: hook(order, source))
+        else:
+            hook(order, source)
+    return True
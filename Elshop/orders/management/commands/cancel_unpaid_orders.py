@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from orders.services import PAYMENT_WINDOW, cancel_unpaid_orders
+
+
+class Command(BaseCommand):
+    help = "Cancel orders left unpaid past the payment window and return their stock."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes', type=int, default=int(PAYMENT_WINDOW.total_seconds() // 60),
+            help=f"Minutes an order may stay unpaid (default: {int(PAYMENT_WINDOW.total_seconds() // 60)}).",
+        )
+        parser.add_argument(
+            '--poll', type=float, default=60.0,
+            help="Seconds to sleep between sweeps.",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Sweep once and exit instead of polling (for cron).",
+        )
+
+    def handle(self, *args, **options):
+        window = timedelta(minutes=max(options['minutes'], 1))
+
+        while True:
+            cancelled = cancel_unpaid_orders(window)
+            if cancelled:
+                self.stdout.write(f"Cancelled {cancelled} unpaid orders.")
+
+            if options['once']:
+                break
+            time.sleep(options['poll'])
+
+        self.stdout.write(self.style.SUCCESS("Unpaid orders cancelled."))
@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.exports import CHUNK_SIZE, default_workers, orders_between, stream_invoice_zip
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}; use YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = "Write the invoices of every completed order placed in a date range to a ZIP file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', required=True, help="First day, YYYY-MM-DD.")
+        parser.add_argument('--to', dest='end', required=True, help="Last day (inclusive), YYYY-MM-DD.")
+        parser.add_argument(
+            '--output', '-o',
+            help="ZIP file to write (default: invoices_<from>_<to>.zip).",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=default_workers(),
+            help="Number of rendering processes (default: CPU count).",
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Orders per task.")
+
+    def handle(self, *args, **options):
+        start, end = _date(options['start']), _date(options['end'])
+        if start > end:
+            raise CommandError("--from is after --to.")
+
+        orders = orders_between(start, end)
+        total = orders.count()
+        path = options['output'] or f"invoices_{start}_{end}.zip"
+
+        with open(path, 'wb') as fh:
+            for data in stream_invoice_zip(
+                orders, workers=options['workers'], chunk_size=max(options['chunk_size'], 1)
+            ):
+                fh.write(data)
+
+        self.stdout.write(self.style.SUCCESS(f"Exported {total} invoices to {path}."))
@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from orders.models import Order
+from orders.reporting import local_day, rebuild
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}; use YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily sales rollups from the order tables "
+        "(all history by default). Completed orders are added incrementally; "
+        "use this after imports or manual fixes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help="First day, YYYY-MM-DD (default: first order).")
+        parser.add_argument('--to', dest='end', help="Last day (inclusive), YYYY-MM-DD (default: last order).")
+
+    def handle(self, *args, **options):
+        bounds = Order.objects.aggregate(first=Min('order_date'), last=Max('order_date'))
+        if bounds['first'] is None:
+            self.stdout.write("No orders.")
+            return
+
+        start = _date(options['start']) if options['start'] else local_day(bounds['first'])
+        end = _date(options['end']) if options['end'] else local_day(bounds['last'])
+        if start > end:
+            raise CommandError("--from is after --to.")
+
+        days = rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups for {start}..{end} ({days} days with sales)."))
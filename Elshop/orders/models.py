@@ -1,4 +1,6 @@
 # Create your models here.
+from decimal import Decimal
+
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import User
@@ -90,13 +92,29 @@ class Address(models.Model):
         return f"{self.full_name}, {self.address_line1}, {self.city}, {self.state} - {self.pincode}"
 
 class Order(models.Model):
+    # changed only through orders.lifecycle.transition()
+    PENDING = 'PENDING'
+    COMPLETED = 'COMPLETED'
+    CANCELLED = 'CANCELLED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (COMPLETED, 'Completed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     order_date = models.DateTimeField(auto_now_add=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
-    status = models.CharField(max_length=20, choices=[('PENDING','Pending'),('COMPLETED','Completed')])
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
     razorpay_order_id = models.CharField(max_length=255)
     address = models.ForeignKey(Address, on_delete=models.CASCADE, null=True, blank=True, related_name="orders")
 
+    class Meta:
+        indexes = [
+            # date-range scans (invoice export)
+            models.Index(fields=['order_date', 'id'], name='order_date_id_idx'),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} for {self.user.username}"
     
@@ -104,10 +122,48 @@ class OrderDetails(models.Model):
     order = models.ForeignKey(Order, related_name="order_details", on_delete=models.CASCADE)
     order_item = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
+    # line total: quantity x the unit price at order time
     price = models.DecimalField(max_digits=10, decimal_places=2)
 
     def __str__(self):
         return f"Order #{self.order.id} - {self.order_item.title} (x{self.quantity})"
 
+    @property
+    def unit_price(self):
+        if not self.quantity:
+            return self.price
+        return (self.price / self.quantity).quantize(Decimal('0.01'))
+
+    
     
-    
\ No newline at end of file
+
+# =========================
+# SALES ROLLUPS
+# =========================
+# Completed orders, pre-aggregated per day (by local order date) so
+# reports never scan Order/OrderDetails. Maintained by orders.reporting.
+
+class DailySales(models.Model):
+    day = models.DateField(unique=True)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.orders} orders, ₹{self.revenue}"
+
+
+class DailyProductSales(models.Model):
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product'], name='daily_product_sales_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.product_id}: {self.units} units, ₹{self.revenue}"
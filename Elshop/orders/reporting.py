@@ -0,0 +1,143 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, PositiveIntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyProductSales, DailySales, Order, OrderDetails
+
+
+# =============================
+# SALES ROLLUPS
+# =============================
+# DailySales and DailyProductSales are bumped in the transaction that
+# completes an order, with a fixed number of queries: insert any missing
+# rows as zeros (ignore_conflicts), then one UPDATE adding the order's
+# figures to every product row at once. `manage.py rebuild_sales_rollups`
+# recomputes a date range from the order tables when needed.
+
+REBUILD_BATCH = 1000
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def local_day(moment):
+    return timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+
+
+def record_order(order):
+    """Add a newly completed order to the rollups."""
+    lines = {}
+    # OrderDetails.price is the line total
+    for product_id, quantity, price in order.order_details.values_list('order_item_id', 'quantity', 'price'):
+        units, revenue = lines.get(product_id, (0, 0))
+        lines[product_id] = (units + quantity, revenue + price)
+    if not lines:
+        return
+
+    day = local_day(order.order_date)
+
+    DailyProductSales.objects.bulk_create(
+        [DailyProductSales(day=day, product_id=product_id) for product_id in lines],
+        ignore_conflicts=True,
+    )
+    DailyProductSales.objects.filter(day=day, product_id__in=lines).update(
+        units=F('units') + Case(
+            *[When(product_id=pk, then=Value(units)) for pk, (units, _) in lines.items()],
+            output_field=PositiveIntegerField(),
+        ),
+        revenue=F('revenue') + Case(
+            *[When(product_id=pk, then=Value(revenue)) for pk, (_, revenue) in lines.items()],
+            output_field=MONEY,
+        ),
+        orders=F('orders') + 1,
+    )
+
+    DailySales.objects.bulk_create([DailySales(day=day)], ignore_conflicts=True)
+    DailySales.objects.filter(day=day).update(
+        units=F('units') + sum(units for units, _ in lines.values()),
+        revenue=F('revenue') + sum(revenue for _, revenue in lines.values()),
+        orders=F('orders') + 1,
+    )
+
+
+def _completed_lines(start, end):
+    tz = timezone.get_current_timezone()
+    return (
+        OrderDetails.objects.filter(
+            order__status=Order.COMPLETED,
+            order__order_date__gte=timezone.make_aware(datetime.combine(start, time.min), tz),
+            order__order_date__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+        )
+        .annotate(day=TruncDate('order__order_date', tzinfo=tz))
+        .order_by()
+    )
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@transaction.atomic
+def rebuild(start, end):
+    """Recompute the rollups for ``start``..``end`` (dates, inclusive). Returns the days written."""
+    DailyProductSales.objects.filter(day__range=(start, end)).delete()
+    DailySales.objects.filter(day__range=(start, end)).delete()
+
+    lines = _completed_lines(start, end)
+    figures = dict(
+        units=Sum('quantity'),
+        revenue=Sum('price', output_field=MONEY),
+        orders=Count('order', distinct=True),
+    )
+
+    per_product = (
+        lines.values('day', 'order_item_id')
+        .annotate(**figures)
+        .iterator(chunk_size=REBUILD_BATCH)
+    )
+    for batch in _batched(per_product, REBUILD_BATCH):
+        DailyProductSales.objects.bulk_create([
+            DailyProductSales(
+                day=row['day'], product_id=row['order_item_id'],
+                units=row['units'], revenue=row['revenue'], orders=row['orders'],
+            )
+            for row in batch
+        ])
+
+    days = [
+        DailySales(day=row['day'], units=row['units'], revenue=row['revenue'], orders=row['orders'])
+        for row in lines.values('day').annotate(**figures)
+    ]
+    DailySales.objects.bulk_create(days, batch_size=REBUILD_BATCH)
+    return len(days)
+
+
+# =============================
+# DASHBOARD QUERIES
+# =============================
+# Everything below reads the rollup tables only.
+
+def sales_summary(start, end, top=10):
+    days = list(DailySales.objects.filter(day__range=(start, end)).order_by('day'))
+    totals = DailySales.objects.filter(day__range=(start, end)).aggregate(
+        revenue=Sum('revenue'), units=Sum('units'), orders=Sum('orders'),
+    )
+    top_products = (
+        DailyProductSales.objects.filter(day__range=(start, end))
+        .values('product_id', 'product__title')
+        .annotate(revenue=Sum('revenue'), units=Sum('units'), orders=Sum('orders'))
+        .order_by('-revenue', 'product_id')[:top]
+    )
+    return {
+        'days': days,
+        'totals': totals,
+        'top_products': list(top_products),
+    }
@@ -0,0 +1,173 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from django.utils.timezone import now
+
+from cart.cache import cart_changed
+from cart.models import CartItem
+from products.cache import invalidate_product_detail
+from products.models import Product, StockReservation
+from products.reservations import InsufficientStock
+from .lifecycle import InvalidTransition, transition
+from .models import Order, OrderDetails
+
+
+# =============================
+# ORDER CREATION
+# =============================
+# The cart becomes an order in one transaction with a fixed number of
+# queries however many lines it has: one joined cart read, one read of
+# the user's holds, one UPDATE that takes every line's units out of stock
+# (and out of the user's holds), then the order, a bulk insert of its
+# lines and one DELETE of the cart. Any failure rolls all of it back.
+#
+# The stock UPDATEs bypass Product signals, so the detail pages of the
+# products involved are dropped from the cache once the change commits.
+
+class EmptyCart(Exception):
+    pass
+
+
+def _stock_changed(product_ids):
+    product_ids = list(product_ids)
+
+    def invalidate():
+        for pk in product_ids:
+            invalidate_product_detail(pk)
+
+    transaction.on_commit(invalidate)
+
+
+def _take_stock(lines, held):
+    """
+    stock -= quantity and reserved -= the user's hold for every line, in
+    one UPDATE. Each row only matches while the units not held by other
+    shoppers cover the line. Returns the number of products updated.
+    """
+    condition = Q()
+    stock = []
+    reserved = []
+    for product_id, quantity in lines.items():
+        hold = held.get(product_id, 0)
+        condition |= Q(pk=product_id, stock__gte=F('reserved') - hold + quantity)
+        stock.append(When(pk=product_id, then=F('stock') - quantity))
+        reserved.append(When(pk=product_id, then=F('reserved') - hold))
+
+    return Product.objects.filter(condition).update(
+        stock=Case(*stock, default=F('stock'), output_field=PositiveIntegerField()),
+        reserved=Case(*reserved, default=F('reserved'), output_field=PositiveIntegerField()),
+    )
+
+
+def _shortage(lines, held):
+    """The first line the stock cannot cover, as InsufficientStock."""
+    rows = Product.objects.filter(pk__in=lines).values_list('id', 'stock', 'reserved')
+    available = {pk: stock - reserved for pk, stock, reserved in rows}
+    for product_id, quantity in sorted(lines.items()):
+        left = available.get(product_id, 0) + held.get(product_id, 0)
+        if left < quantity:
+            return InsufficientStock(product_id, max(left, 0))
+    return InsufficientStock(None, 0)
+
+
+@transaction.atomic
+def create_order_from_cart(user):
+    """
+    Turn ``user``'s cart into a PENDING order and empty the cart.
+    Raises EmptyCart or InsufficientStock (nothing is written then).
+    """
+    items = list(
+        CartItem.objects.filter(user=user).select_related('product').order_by('product_id')
+    )
+    if not items:
+        raise EmptyCart()
+
+    lines = {item.product_id: item.quantity for item in items}
+
+    # locked so the expiry sweeper cannot hand these units back meanwhile
+    held = dict(
+        StockReservation.objects.select_for_update()
+        .filter(user=user, product_id__in=lines)
+        .values_list('product_id', 'quantity')
+    )
+
+    savepoint = transaction.savepoint()
+    if _take_stock(lines, held) != len(lines):
+        # undo the lines that did fit before reading what is left
+        transaction.savepoint_rollback(savepoint)
+        raise _shortage(lines, held)
+    transaction.savepoint_commit(savepoint)
+    _stock_changed(lines)
+
+    StockReservation.objects.filter(user=user, product_id__in=lines).delete()
+
+    order = Order.objects.create(
+        user=user,
+        total_amount=sum(item.subtotal for item in items),
+        order_date=now(),
+        status=Order.PENDING
+    )
+
+    OrderDetails.objects.bulk_create([
+        OrderDetails(
+            order=order,
+            order_item=item.product,
+            quantity=item.quantity,
+            # line total (quantity x unit price), as OrderDetails.price has
+            # always been stored; see OrderDetails.unit_price
+            price=item.subtotal,
+        )
+        for item in items
+    ])
+
+    CartItem.objects.filter(user=user).delete()
+    cart_changed(user.pk)
+
+    return order
+
+
+def return_stock(order):
+    """Put ``order``'s units back into stock with one UPDATE (on cancellation)."""
+    lines = {}
+    for product_id, quantity in order.order_details.values_list('order_item_id', 'quantity'):
+        lines[product_id] = lines.get(product_id, 0) + quantity
+    if not lines:
+        return 0
+
+    _stock_changed(lines)
+    return Product.objects.filter(pk__in=lines).update(
+        stock=Case(
+            *[When(pk=product_id, then=F('stock') + quantity) for product_id, quantity in lines.items()],
+            default=F('stock'),
+            output_field=PositiveIntegerField(),
+        ),
+    )
+
+
+# =============================
+# UNPAID ORDERS
+# =============================
+# A PENDING order already holds its units, so orders that are never paid
+# have to give them back: `manage.py cancel_unpaid_orders` cancels the
+# orders left unpaid for longer than PAYMENT_WINDOW, and cancelling
+# restocks through the CANCELLED hook (orders.signals). The Razorpay order
+# stays payable, so a payment that still arrives for a cancelled order is
+# refunded (payments.views).
+
+PAYMENT_WINDOW = timedelta(hours=1)
+
+
+def cancel_unpaid_orders(window=PAYMENT_WINDOW):
+    """Cancel PENDING orders placed more than ``window`` ago. Returns the number cancelled."""
+    stale = Order.objects.filter(status=Order.PENDING, order_date__lt=now() - window).order_by('id')
+
+    cancelled = 0
+    for order in stale.iterator():
+        try:
+            if transition(order, Order.CANCELLED):
+                cancelled += 1
+        except InvalidTransition:
+            # paid in the meantime
+            pass
+    return cancelled
@@ -1,22 +1,23 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from django.core.mail import EmailMessage
-from django.conf import settings
-
+from mainapp.outbox import enqueue_mail
+from .lifecycle import on_transition
 from .models import Order
-from .utils import generate_invoice_pdf
-
+from .reporting import record_order
+from .services import return_stock
+from .utils import invoice_attachment
 
-@receiver(post_save, sender=Order)
-def order_success_notification(sender, instance, created, **kwargs):
 
-    if instance.status == "COMPLETED":
-        pdf_buffer = generate_invoice_pdf(instance)
+# Order side effects hang off lifecycle transitions instead of post_save,
+# so each runs once per transition rather than on every save. All of them
+# write inside the transition's transaction: the outbox row, the sales
+# rollups and the restocked units commit or roll back with the new status.
 
-        email = EmailMessage(
-            subject=f"Order Confirmed & Invoice – #{instance.id}",
-            body=f"""
-Hi {instance.user.username},
+@on_transition(Order.COMPLETED, on_commit=False)
+def order_success_notification(order, source):
+    # the invoice is rendered by the outbox worker, not in the payment request
+    enqueue_mail(
+        subject=f"Order Confirmed & Invoice – #{order.id}",
+        body=f"""
+Hi {order.user.username},
 
 🎉 Your order has been successfully completed!
 
@@ -24,14 +25,17 @@ Please find your invoice attached as a PDF.
 
 Thank you for shopping with PlayZoneX ❤️
 """,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[instance.user.email],
-        )
+        to=[order.user.email],
+        attachments=[invoice_attachment(order)],
+    )
+
+
+@on_transition(Order.COMPLETED, on_commit=False)
+def update_sales_rollups(order, source):
+    record_order(order)
 
-        email.attach(
-            f"invoice_order_{instance.id}.pdf",
-            pdf_buffer.read(),
-            "application/pdf"
-        )
 
-        email.send(fail_silently=False)
+@on_transition(Order.CANCELLED, on_commit=False)
+def restock_cancelled_order(order, source):
+    # stock is taken when the order is created (orders.services)
+    return_stock(order)
@@ -9,9 +9,15 @@ urlpatterns = [
     # Route to display the user's order history
     path('orders/history/', views.order_history, name='order_history'),
     
+    # Next page of order history for infinite scroll (JSON)
+    path('orders/history/page/', views.order_history_json, name='order_history_json'),
+    
     # Route to order history version 2
     path('orders/history/v2', views.order_history_2, name='order_history_2'),
     
+    # Staff sales dashboard (daily rollups)
+    path('orders/sales/', views.sales_dashboard, name='sales_dashboard'),
+    
     # Route to view details of a specific order
     path('<int:order_id>/', views.order_detail, name='order_detail'),
     
@@ -1,4 +1,105 @@
+import glob
+import hashlib
+import os
+import tempfile
 from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+
+
+# =========================
+# INVOICE CACHE
+# =========================
+# Rendered invoices are kept on disk as order_<id>_<hash>.pdf, where the
+# hash covers everything the PDF prints. Any change to those fields (a
+# status update, a new address, edited lines) gives a new file name, so a
+# stale invoice is never served; the superseded file is removed when the
+# new one is written. Bump INVOICE_LAYOUT_VERSION when the layout below
+# changes to re-render every invoice.
+
+INVOICE_LAYOUT_VERSION = 2
+
+
+def invoice_cache_dir():
+    return Path(settings.INVOICE_CACHE_DIR)
+
+
+def invoice_fingerprint(order):
+    """sha256 of the fields generate_invoice_pdf renders."""
+    address = order.address
+    parts = [
+        INVOICE_LAYOUT_VERSION,
+        order.id,
+        order.user.username,
+        order.order_date.strftime('%d %b %Y'),
+        order.status,
+    ]
+    if address:
+        parts += [address.address_line1, address.city, address.state, address.pincode]
+    for item in order.order_details.all():
+        parts += [item.order_item.title, item.quantity, f"{item.price:.2f}"]
+
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()
+
+
+def invoice_path(order):
+    """
+    Path of the cached invoice for ``order``, rendering it first when the
+    order changed since it was last rendered.
+    """
+    directory = invoice_cache_dir()
+    path = directory / f"order_{order.id}_{invoice_fingerprint(order)[:16]}.pdf"
+    if path.exists():
+        return path
+
+    directory.mkdir(parents=True, exist_ok=True)
+    pdf = generate_invoice_pdf(order)
+
+    # written under a temporary name and renamed, so a concurrent request
+    # never reads a half-written file
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf.getvalue())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    for old in glob.glob(str(directory / f"order_{order.id}_*.pdf")):
+        if old != str(path):
+            try:
+                os.unlink(old)
+            except FileNotFoundError:
+                pass
+
+    return path
+
+
+def invoice_pdf_bytes(order):
+    return invoice_path(order).read_bytes()
+
+
+def order_invoice_pdf(order_id):
+    """Invoice bytes by order id; used for outbox attachments built at send time."""
+    from .models import Order
+
+    order = Order.objects.select_related('user', 'address').prefetch_related(
+        'order_details__order_item'
+    ).get(pk=order_id)
+    return invoice_pdf_bytes(order)
+
+
+def invoice_attachment(order):
+    """Outbox attachment spec for an order's invoice."""
+    return {
+        'filename': f"invoice_order_{order.id}.pdf",
+        'mimetype': 'application/pdf',
+        'builder': 'order_invoice',
+        'args': [order.id],
+    }
+
 
 def generate_invoice_pdf(order):
     try:
@@ -112,7 +213,7 @@ def generate_invoice_pdf(order):
     p.setFont("Helvetica", 10)
 
     for i, item in enumerate(order.order_details.all()):
-        item_total = item.quantity * item.price
+        item_total = item.price
 
         p.setFillColor(colors.HexColor("#f8f9fa") if i % 2 == 0 else colors.white)
         p.rect(40, y - 5, width - 80, 20, fill=1, stroke=0)
@@ -124,7 +225,7 @@ def generate_invoice_pdf(order):
         p.setFillColor(text_dark)
         p.drawString(50, y, title)
         p.drawRightString(width - 200, y, str(item.quantity))
-        p.drawRightString(width - 120, y, f"₹{item.price:,.2f}")
+        p.drawRightString(width - 120, y, f"₹{item.unit_price:,.2f}")
         p.drawRightString(width - 50, y, f"₹{item_total:,.2f}")
 
         y -= 25
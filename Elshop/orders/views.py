@@ -1,11 +1,16 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.db.models import Prefetch, Sum
+from django.db.models.functions import Coalesce
 from django.contrib.auth.decorators import login_required
-from django.utils.timezone import now
 from django.contrib import messages
 
-from cart.models import CartItem
+from products.pagination import InvalidCursor, keyset_paginate
+from products.reservations import InsufficientStock
+from .lifecycle import InvalidTransition, transition
 from .models import Order, OrderDetails, Address
+from .services import EmptyCart, create_order_from_cart
 from .forms import AddressForm, OrderForm
 
 
@@ -13,59 +18,120 @@ from .forms import AddressForm, OrderForm
 @login_required
 def create_order(request):
     """Create an order from the user's cart items and redirect to the Select Address view."""
-    user = request.user
-    cart_items = CartItem.objects.filter(user=user)
-
-    if not cart_items.exists():
+    try:
+        order = create_order_from_cart(request.user)
+    except EmptyCart:
         # Redirect to an empty cart page if no items are in the cart
         context = {
             'error': 'Your cart is empty.'
             }
         return render(request, 'cart/cart.html', context )
+    except InsufficientStock as e:
+        messages.error(request, f"Only {e.available} left of one of your items. Please update your cart.")
+        return redirect('view_cart')
 
-    # Calculate the total amount of the cart
-    total_amount = sum(item.subtotal for item in cart_items)
+    # Redirect to the Select Address view
+    return redirect('select_address_for_order', order_id=order.id)
 
-    # Create an order record
-    order = Order.objects.create(
-        user=user,
-        total_amount=total_amount,
-        order_date=now(),
-        status='PENDING'
-    )
+# =============================
+# ORDER HISTORY
+# =============================
+# Newest orders first, one keyset page at a time (see products/pagination.py).
+# A page is always four queries: the orders with their address and
+# annotated totals, then the lines with their products.
 
-    # Create order detail records for each cart item
-    for item in cart_items:
-        OrderDetails.objects.create(
-            order=order,
-            order_item=item.product,
-            quantity=item.quantity,
-            price=item.product.price * item.quantity
-        )
+ORDER_PAGE_SIZE = 10
+ORDER_ORDERING = ('-order_date', '-id')
 
-    # Clear the cart after creating the order
-    cart_items.delete()
 
-    # Redirect to the Select Address view
-    return redirect('select_address_for_order', order_id=order.id)
+def order_lines():
+    """OrderDetails with their product (price is the line total)."""
+    return OrderDetails.objects.select_related('order_item').order_by('id')
+
+
+def order_history_queryset(user):
+    lines = order_lines()
+
+    return Order.objects.filter(user=user).select_related('address').annotate(
+        item_count=Coalesce(Sum('order_details__quantity'), 0),
+    ).prefetch_related(Prefetch('order_details', queryset=lines))
+
+
+def order_history_page(request):
+    """One page of the user's orders plus the links to the next one."""
+    queryset = order_history_queryset(request.user)
+    try:
+        page = keyset_paginate(queryset, request.GET.get('cursor'), ordering=ORDER_ORDERING, per_page=ORDER_PAGE_SIZE)
+    except InvalidCursor:
+        page = keyset_paginate(queryset, ordering=ORDER_ORDERING, per_page=ORDER_PAGE_SIZE)
+
+    context = {
+        'orders' : page,
+        'next_page_url' : None,
+        'more_url' : None,
+    }
+
+    if page.has_next:
+        query = f"cursor={page.next_cursor}"
+        context['next_page_url'] = f"{request.path}?{query}"
+        context['more_url'] = f"{reverse('order_history_json')}?{query}"
+
+    return context
+
 
 @login_required
 def order_history(request):
     """Display the order history of the user."""
-    orders = Order.objects.filter(user=request.user).prefetch_related('order_details').order_by('-order_date')
-    return render(request, 'orders/order_history.html', {'orders': orders})
+    return render(request, 'orders/order_history.html', order_history_page(request))
 
 # the below view is just another version of the previous view to try out a different appearance
 @login_required
 def order_history_2(request):
     """Display the order history of the user."""
-    orders = Order.objects.filter(user=request.user).prefetch_related('order_details').order_by('-order_date')
-    return render(request, 'orders/order_history_2.html', {'orders': orders})
+    return render(request, 'orders/order_history_2.html', order_history_page(request))
+
+
+def order_as_dict(order):
+    return {
+        'id': order.id,
+        'order_date': order.order_date.isoformat(),
+        'status': order.status,
+        'total_amount': order.total_amount,
+        'item_count': order.item_count,
+        'detail_url': reverse('order_detail', args=[order.id]),
+        'items': [
+            {
+                'product_id': line.order_item_id,
+                'title': line.order_item.title,
+                'quantity': line.quantity,
+                'unit_price': line.unit_price,
+                'line_total': line.price,
+            }
+            for line in order.order_details.all()
+        ],
+    }
+
+
+# next page for infinite scroll (JSON)
+@login_required
+def order_history_json(request):
+    context = order_history_page(request)
+    page = context['orders']
+
+    return JsonResponse({
+        'orders': [order_as_dict(order) for order in page],
+        'next_cursor': page.next_cursor,
+        'next_url': context['more_url'],
+        'has_next': page.has_next,
+    })
 
 @login_required
 def order_detail(request, order_id):
     """Display details of a specific order."""
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+    order = get_object_or_404(
+        Order.objects.select_related('address').prefetch_related(Prefetch('order_details', queryset=order_lines())),
+        id=order_id, user=request.user
+    )
     return render(request, 'orders/order_detail.html', {'order': order})
 
 @login_required
@@ -105,7 +171,8 @@ def select_address_for_order(request, order_id):
         
         # Associate the selected address with the order
         order.address = address
-        order.save()
+        # never write status back from this (possibly stale) instance
+        order.save(update_fields=['address'])
         
         # Redirect to the Razorpay order creation and payment page
         return redirect('payment:create_razorpay_order', order_id=order.id)
@@ -119,7 +186,9 @@ def update_order(request, order_id):
     if request.method == 'POST':
         form = OrderForm(request.POST, instance=order)
         if form.is_valid():
-            form.save()
+            order = form.save(commit=False)
+            # never write status back from this (possibly stale) instance
+            order.save(update_fields=['address'])
             return redirect('order_detail', order_id=order.id)
     else:
         form = OrderForm(instance=order)
@@ -131,12 +200,11 @@ def cancel_order(request, order_id):
     """Cancel an order and redirect the user."""
     order = get_object_or_404(Order, id=order_id, user=request.user)
 
-    # Check if the order is still pending
-    if order.status == "PENDING":
-        order.status = "CANCELLED"
-        order.save()
+    # only pending orders can be cancelled; the stock goes back with it
+    try:
+        transition(order, Order.CANCELLED)
         messages.success(request, "Your order has been cancelled.")
-    else:
+    except InvalidTransition:
         messages.error(request, "This order cannot be cancelled.")
 
     return redirect("home_page")
@@ -144,25 +212,27 @@ def cancel_order(request, order_id):
 
 @login_required
 def download_invoice_pdf(request, order_id):
-    """Generate and download invoice PDF for an order."""
-    order = get_object_or_404(Order, id=order_id, user=request.user)
-    pdf_buffer = generate_invoice_pdf(order)
-    
-    response = HttpResponse(pdf_buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="invoice_order_{order.id}.pdf"'
-    return response
+    """Download the invoice PDF for an order, rendered once and then served from disk."""
+    order = get_object_or_404(
+        Order.objects.select_related('user', 'address').prefetch_related('order_details__order_item'),
+        id=order_id,
+        user=request.user,
+    )
+    return FileResponse(
+        open(invoice_path(order), 'rb'),
+        as_attachment=True,
+        filename=f"invoice_order_{order.id}.pdf",
+        content_type='application/pdf',
+    )
 
 
 
 # in voice
-from django.core.mail import EmailMessage
-from django.conf import settings
-from .utils import generate_invoice_pdf
+from mainapp.outbox import enqueue_mail
+from .utils import invoice_attachment, invoice_path
 
 def send_invoice_email(order):
-    pdf_buffer = generate_invoice_pdf(order)
-
-    email = EmailMessage(
+    return enqueue_mail(
         subject=f"Invoice for Order #{order.id} – PlayZoneX",
         body=(
             f"Hi {order.user.username},\n\n"
@@ -170,15 +240,60 @@ def send_invoice_email(order):
             "Please find your invoice attached.\n\n"
             "— PlayZoneX Team"
         ),
-        from_email=settings.DEFAULT_FROM_EMAIL,
         to=[order.user.email],
+        attachments=[invoice_attachment(order)],
     )
 
-    email.attach(
-        f"invoice_order_{order.id}.pdf",
-        pdf_buffer.read(),
-        "application/pdf",
-    )
-
-    email.send()
 
+# =============================
+# SALES DASHBOARD
+# =============================
+# Staff only. Reads the daily rollups (orders.reporting), never the order
+# tables, so it costs the same however many orders exist.
+
+from datetime import date, timedelta
+from django.contrib.admin.views.decorators import staff_member_required
+from django.utils import timezone
+from .reporting import sales_summary
+
+DASHBOARD_DAYS = 30
+DASHBOARD_MAX_DAYS = 366
+# earlier dates are clamped: no sales before it, and it keeps the date
+# arithmetic below clear of date.min
+DASHBOARD_FLOOR = date(2000, 1, 1)
+
+
+def _parse_day(value):
+    return max(date.fromisoformat(value), DASHBOARD_FLOOR)
+
+
+def _report_range(request):
+    end = timezone.localdate()
+    start = end - timedelta(days=DASHBOARD_DAYS - 1)
+    try:
+        if request.GET.get('to'):
+            end = _parse_day(request.GET['to'])
+        if request.GET.get('from'):
+            start = _parse_day(request.GET['from'])
+        else:
+            start = end - timedelta(days=DASHBOARD_DAYS - 1)
+    except ValueError:
+        messages.error(request, "Dates must look like YYYY-MM-DD.")
+        end = timezone.localdate()
+        start = end - timedelta(days=DASHBOARD_DAYS - 1)
+
+    if start > end:
+        start, end = end, start
+    start = max(start, end - timedelta(days=DASHBOARD_MAX_DAYS - 1))
+    return start, end
+
+
+@staff_member_required
+def sales_dashboard(request):
+    start, end = _report_range(request)
+    context = sales_summary(start, end)
+    context.update({
+        'start': start,
+        'end': end,
+    })
+    return render(request, 'orders/sales_dashboard.html', context)
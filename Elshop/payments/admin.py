@@ -1,3 +1,78 @@
 from django.contrib import admin
 
 # Register your models here.
+from orders.exports import csv_export_action
+from products.pagination import EstimatedCountPaginator
+from .models import Payment, PaymentAttempt
+
+
+PAYMENT_CSV_COLUMNS = [
+    ('id', 'id'),
+    ('order_id', 'order_id'),
+    ('razorpay_order_id', 'razorpay_order_id'),
+    ('status', 'status'),
+    ('amount', 'order__total_amount'),
+    ('username', 'order__user__username'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+PAYMENT_ATTEMPT_CSV_COLUMNS = [
+    ('id', 'id'),
+    ('payment_id', 'payment_id'),
+    ('order_id', 'payment__order_id'),
+    ('razorpay_order_id', 'payment__razorpay_order_id'),
+    ('razorpay_payment_id', 'razorpay_payment_id'),
+    ('status', 'status'),
+    ('attempt_time', 'attempt_time'),
+    ('failure_reason', 'failure_reason'),
+]
+
+
+# =========================
+# PAYMENT ATTEMPT INLINE
+# =========================
+class PaymentAttemptInline(admin.TabularInline):
+    model = PaymentAttempt
+    extra = 0
+    fields = ('razorpay_payment_id', 'status', 'attempt_time', 'failure_reason')
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+# =========================
+# PAYMENT ADMIN
+# =========================
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'order', 'razorpay_order_id', 'status', 'created_at')
+    list_filter = ('status',)
+    # Order.__str__ reads the user
+    list_select_related = ('order__user',)
+    search_fields = ('=order__id', 'razorpay_order_id')
+    raw_id_fields = ('order',)
+    inlines = [PaymentAttemptInline]
+    actions = [csv_export_action(PAYMENT_CSV_COLUMNS, 'payments')]
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+# =========================
+# PAYMENT ATTEMPT ADMIN
+# =========================
+@admin.register(PaymentAttempt)
+class PaymentAttemptAdmin(admin.ModelAdmin):
+    list_display = ('id', 'payment', 'razorpay_payment_id', 'status', 'attempt_time')
+    list_filter = ('status',)
+    # Payment.__str__ reads the order
+    list_select_related = ('payment__order',)
+    search_fields = ('=payment__order__id', 'razorpay_payment_id', 'payment__razorpay_order_id')
+    raw_id_fields = ('payment',)
+    actions = [csv_export_action(PAYMENT_ATTEMPT_CSV_COLUMNS, 'payment_attempts')]
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -1,16 +1,49 @@
 import razorpay
 from django.conf import settings
+from django.db import transaction
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
+from django.utils import timezone
 from .models import Payment, PaymentAttempt
+from mainapp.outbox import enqueue_mail
+from orders.lifecycle import InvalidTransition, transition
 from orders.models import Order, Address
 from orders.forms import AddressForm
 
 # Initialize Razorpay client
 client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
 
+
+def refund_late_payment(payment, attempt):
+    """
+    Refund a payment captured after its order was cancelled (the Razorpay
+    order stays payable) and tell ops either way. Returns True when the
+    refund went through.
+    """
+    try:
+        client.payment.refund(attempt.razorpay_payment_id, {})
+        refunded = True
+        attempt.failure_reason = "Captured after the order was cancelled; refunded."
+    except Exception as e:
+        refunded = False
+        attempt.failure_reason = f"Captured after the order was cancelled; refund failed: {e}"
+    attempt.save(update_fields=['failure_reason'])
+
+    enqueue_mail(
+        subject=f"Payment captured for cancelled order #{payment.order_id}",
+        body=(
+            f"Razorpay payment {attempt.razorpay_payment_id} (order {payment.razorpay_order_id}) "
+            f"was captured after order #{payment.order_id} had been cancelled.\n\n"
+            f"{attempt.failure_reason}\n"
+            + ("" if refunded else "Please refund it from the Razorpay dashboard.\n")
+        ),
+        to=[settings.ADMIN_EMAIL],
+    )
+    return refunded
+
+
 @login_required
 def create_razorpay_order(request, order_id):
     """Create a Razorpay order and render the checkout page."""
@@ -68,18 +101,32 @@ def payment_success(request):
         order = payment.order
 
         # Update Payment Attempt
-        PaymentAttempt.objects.create(
+        attempt = PaymentAttempt.objects.create(
             payment=payment,
             razorpay_payment_id=razorpay_payment_id,
             razorpay_signature=razorpay_signature,
             status="SUCCESS",
         )
 
-        # Mark Payment and Order as Completed
-        payment.status = "COMPLETED"
-        payment.save()
-        order.status = "COMPLETED"
-        order.save()
+        # Mark Payment and Order as Completed; a repeated callback finds
+        # the order already completed and sends nothing again
+        try:
+            with transaction.atomic():
+                transition(order, Order.COMPLETED)
+                payment.status = "COMPLETED"
+                payment.save()
+        except InvalidTransition:
+            # the order was cancelled (by the customer or the unpaid-order
+            # sweep) but the money was captured anyway: record it and give
+            # it back, once, whichever callback gets here first
+            won = Payment.objects.filter(pk=payment.pk).exclude(status="COMPLETED").update(
+                status="COMPLETED", updated_at=timezone.now()
+            )
+            if won and refund_late_payment(payment, attempt):
+                error = "This order was cancelled before your payment arrived. The amount has been refunded."
+            else:
+                error = "This order was cancelled before your payment arrived. The amount will be refunded."
+            return render(request, "payments/failure.html", {"error": error})
 
         return render(request, "payments/success.html", {"order": order})
 
@@ -117,7 +164,11 @@ def payment_failure(request):
         failure_reason=failure_reason,
     )
 
-    payment.status = "FAILED"
-    payment.save()
+    # only recorded: this callback is not signed, so it never cancels the
+    # order (unpaid orders are cancelled by `manage.py cancel_unpaid_orders`),
+    # and a late one does not undo a completed payment
+    if payment.status != "COMPLETED":
+        payment.status = "FAILED"
+        payment.save()
 
     return render(request, "payments/failure.html", {"error": failure_reason})
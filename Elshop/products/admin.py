@@ -1,5 +1,21 @@
 from django.contrib import admin
-from .models import Product, ProductImage, ProductVideo
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Product, ProductImage, ProductVideo, MediaJob
+from .pagination import EstimatedCountPaginator
+
+
+def _related_count(model):
+    """Correlated COUNT subquery, cheaper than joining both relations and counting distinct."""
+    counts = (
+        model.objects.filter(product=OuterRef('pk'))
+        .order_by()
+        .values('product')
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
 
 
 # =========================
@@ -35,19 +51,26 @@ class ProductAdmin(admin.ModelAdmin):
         'price',
         'offer_price_display',
         'stock',
+        'reserved',
         'discount',
+        'image_count',
+        'video_count',
         'created_at'
     )
 
     list_editable = ('stock', 'discount')
     list_filter = ('created_at',)
-    search_fields = ('title', 'desc')
+    search_fields = ('sku', 'title', 'desc')
     ordering = ('-created_at',)
 
+    # ---- LARGE TABLES ----
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     # ---- FORM VIEW ----
     fieldsets = (
         ('Basic Info', {
-            'fields': ('title', 'desc', 'thumbnail')
+            'fields': ('sku', 'title', 'desc', 'thumbnail')
         }),
         ('Pricing & Stock', {
             'fields': ('price', 'discount', 'stock')
@@ -56,11 +79,24 @@ class ProductAdmin(admin.ModelAdmin):
 
     inlines = [ProductImageInline, ProductVideoInline]
 
-    # ---- CUSTOM COLUMN ----
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            image_count=_related_count(ProductImage),
+            video_count=_related_count(ProductVideo),
+        )
+
+    # ---- CUSTOM COLUMNS ----
+    @admin.display(description='Offer Price', ordering='effective_price')
     def offer_price_display(self, obj):
-        return obj.offer_price
+        return obj.effective_price
 
-    offer_price_display.short_description = 'Offer Price'
+    @admin.display(description='Images', ordering='image_count')
+    def image_count(self, obj):
+        return obj.image_count
+
+    @admin.display(description='Videos', ordering='video_count')
+    def video_count(self, obj):
+        return obj.video_count
 
 
 # =========================
@@ -69,7 +105,10 @@ class ProductAdmin(admin.ModelAdmin):
 @admin.register(ProductImage)
 class ProductImageAdmin(admin.ModelAdmin):
     list_display = ('product', 'caption', 'created_at')
+    list_select_related = ('product',)
     search_fields = ('product__title',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 # =========================
@@ -78,4 +117,19 @@ class ProductImageAdmin(admin.ModelAdmin):
 @admin.register(ProductVideo)
 class ProductVideoAdmin(admin.ModelAdmin):
     list_display = ('product', 'title', 'video_code', 'created_at')
+    list_select_related = ('product',)
     search_fields = ('product__title', 'title')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+# =========================
+# MEDIA JOB ADMIN
+# =========================
+@admin.register(MediaJob)
+class MediaJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'model_label', 'object_id', 'field_name', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'model_label')
+    readonly_fields = ('error',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CacheVersion, Product, ProductRecommendation
+
+
+# =========================
+# VERSION COUNTERS
+# =========================
+# Cache entries are retired by bumping a version stamp that is part of
+# their keys. The stamps are CacheVersion rows bumped with an F() UPDATE:
+# the file and database cache backends implement incr() as get + set, so
+# two workers bumping at once could get the same number and one
+# invalidation would be lost. Reading a stamp is one primary-key query.
+
+def read_version(name):
+    value = CacheVersion.objects.filter(name=name).values_list('value', flat=True).first()
+    return value or 0
+
+
+@transaction.atomic
+def next_version(name):
+    """Add one to the ``name`` stamp and return the new value, unique even under concurrency."""
+    if not CacheVersion.objects.filter(name=name).update(value=F('value') + 1):
+        try:
+            with transaction.atomic():
+                CacheVersion.objects.create(name=name, value=1)
+        except IntegrityError:
+            # created by a concurrent bump in the meantime
+            CacheVersion.objects.filter(name=name).update(value=F('value') + 1)
+    # the row stays locked by our UPDATE until commit, so this is our value
+    return CacheVersion.objects.filter(name=name).values_list('value', flat=True).get()
+
+
+# =========================
+# PRODUCT DETAIL CACHE
+# =========================
+# The whole ProductDetail context (product with images and videos
+# prefetched, plus the related rail) is cached per product id. Image/video
+# changes drop that product's entry; any Product change bumps the catalog
+# version, which retires every entry because other pages' rails may show
+# the changed product.
+
+DETAIL_TIMEOUT = 60 * 60
+CATALOG_VERSION = 'products:catalog'
+RELATED_LIMIT = 8
+
+
+def catalog_version():
+    return read_version(CATALOG_VERSION)
+
+
+def bump_catalog_version():
+    return next_version(CATALOG_VERSION)
+
+
+def detail_key(pk, version=None):
+    if version is None:
+        version = catalog_version()
+    return f'products:detail:{version}:{pk}'
+
+
+def load_product_detail(pk):
+    product = Product.objects.prefetch_related('images', 'videos').filter(pk=pk).first()
+    if product is None:
+        return None
+
+    return {
+        'product': product,
+        'related': related_products(pk),
+    }
+
+
+def related_products(pk, limit=RELATED_LIMIT):
+    """Co-purchase neighbours first, topped up with the newest products."""
+    related = [
+        rec.recommended
+        for rec in ProductRecommendation.objects.filter(product_id=pk)
+        .select_related('recommended')[:limit]
+    ]
+
+    if len(related) < limit:
+        seen = [pk] + [p.pk for p in related]
+        related += list(
+            Product.objects.exclude(id__in=seen)
+            .order_by('-created_at', '-id')[:limit - len(related)]
+        )
+
+    return related
+
+
+def get_product_detail(pk):
+    """Cached {'product', 'related'} for the detail page, or None if the product does not exist."""
+    key = detail_key(pk)
+    data = cache.get(key)
+
+    if data is None:
+        data = load_product_detail(pk)
+        if data is not None:
+            cache.set(key, data, DETAIL_TIMEOUT)
+
+    return data
+
+
+def invalidate_product_detail(pk):
+    cache.delete(detail_key(pk))
@@ -0,0 +1,122 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+
+# =========================
+# CATALOG IMPORT / EXPORT
+# =========================
+# Row format shared by `import_products` and `export_products`. Readers and
+# writers are generators over the open file, so memory stays flat whatever
+# the catalog size.
+
+FIELDS = ['sku', 'title', 'desc', 'price', 'discount', 'stock', 'thumbnail']
+FORMATS = ('csv', 'jsonl')
+
+# bounds of the Product columns, so a bad row is reported instead of
+# failing the whole batch at insert time
+MAX_PRICE = Decimal('99999999.99')
+MAX_DISCOUNT = Decimal('100')
+MAX_STOCK = 2147483647
+CENT = Decimal('0.01')
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return 'jsonl' if str(path).endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(fh, fmt):
+    """Yield (row, error) pairs from a CSV or JSON-lines file; row is None on a parse error."""
+    if fmt == 'csv':
+        for row in csv.DictReader(fh):
+            yield row, None
+    else:
+        for line_number, line in enumerate(fh, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield None, f"line {line_number}: invalid JSON ({e})"
+                continue
+            if isinstance(row, dict):
+                yield row, None
+            else:
+                yield None, f"line {line_number}: expected a JSON object, got {type(row).__name__}"
+
+
+def _decimal(value, name, maximum, required=False):
+    if value in (None, ''):
+        if required:
+            raise RowError(f"{name} is required")
+        return None
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        raise RowError(f"{name} is not a number: {value!r}")
+    if not number.is_finite():
+        raise RowError(f"{name} is not a number: {value!r}")
+    # checked before quantizing too: quantize() fails on huge exponents
+    if number < 0 or number > maximum or number.quantize(CENT) > maximum:
+        raise RowError(f"{name} must be between 0 and {maximum}: {value!r}")
+    return number.quantize(CENT)
+
+
+def _text(value, name):
+    if value is None:
+        return ''
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise RowError(f"{name} must be text: {value!r}")
+    return str(value)
+
+
+def clean_row(row):
+    """Validate one raw row and return the Product field values."""
+    if not isinstance(row, dict):
+        raise RowError(f"expected an object, got {type(row).__name__}")
+
+    sku = _text(row.get('sku'), 'sku').strip()
+    title = _text(row.get('title'), 'title').strip()
+    if not sku:
+        raise RowError("sku is required")
+    if not title:
+        raise RowError("title is required")
+
+    try:
+        stock = int(row.get('stock') or 0)
+    except (TypeError, ValueError):
+        raise RowError(f"stock is not an integer: {row.get('stock')!r}")
+    if stock < 0:
+        raise RowError("stock cannot be negative")
+    if stock > MAX_STOCK:
+        raise RowError(f"stock is too large: {stock}")
+
+    return {
+        'sku': sku,
+        'title': title[:224],
+        'desc': _text(row.get('desc'), 'desc')[:400],
+        'price': _decimal(row.get('price'), 'price', MAX_PRICE, required=True),
+        'discount': _decimal(row.get('discount'), 'discount', MAX_DISCOUNT),
+        'stock': stock,
+        'thumbnail': _text(row.get('thumbnail'), 'thumbnail').strip(),
+    }
+
+
+def write_rows(fh, fmt, rows):
+    """Write an iterable of dicts (keys = FIELDS) as CSV or JSON lines."""
+    if fmt == 'csv':
+        writer = csv.DictWriter(fh, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+    else:
+        for row in rows:
+            fh.write(json.dumps(row, default=str))
+            fh.write('\n')
@@ -0,0 +1,130 @@
+import traceback
+from datetime import timedelta
+
+from django.apps import apps
+from django.utils import timezone
+
+from .models import MediaJob
+from .renditions import is_current, refresh_renditions
+
+
+# =========================
+# MEDIA JOB QUEUE
+# =========================
+# Uploads only write the original file and a MediaJob row; the resizing
+# happens in `manage.py process_media_jobs`. Jobs are claimed with a
+# conditional UPDATE so several workers can drain the same table. Failed
+# jobs are retried with exponential backoff, and every poll puts jobs
+# left RUNNING by a crashed worker back in the queue.
+
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=15)
+RETRY_BASE = timedelta(seconds=30)
+RETRY_MAX = timedelta(hours=1)
+
+
+def enqueue_renditions(instance, field_name):
+    """Queue a rendition job unless renditions are current or a job is already waiting."""
+    if not getattr(instance, field_name) or is_current(instance, field_name):
+        return None
+
+    model_label = instance._meta.label_lower
+    exists = MediaJob.objects.filter(
+        model_label=model_label,
+        object_id=instance.pk,
+        field_name=field_name,
+        status=MediaJob.PENDING,
+    ).exists()
+    if exists:
+        return None
+
+    return MediaJob.objects.create(
+        model_label=model_label,
+        object_id=instance.pk,
+        field_name=field_name,
+    )
+
+
+def enqueue_renditions_bulk(instances, field_name):
+    """enqueue_renditions() for many saved instances of one model with two queries."""
+    instances = [
+        obj for obj in instances
+        if obj.pk and getattr(obj, field_name) and not is_current(obj, field_name)
+    ]
+    if not instances:
+        return []
+
+    model_label = instances[0]._meta.label_lower
+    waiting = set(
+        MediaJob.objects.filter(
+            model_label=model_label,
+            field_name=field_name,
+            status=MediaJob.PENDING,
+            object_id__in=[obj.pk for obj in instances],
+        ).values_list('object_id', flat=True)
+    )
+
+    return MediaJob.objects.bulk_create([
+        MediaJob(model_label=model_label, object_id=obj.pk, field_name=field_name)
+        for obj in instances
+        if obj.pk not in waiting
+    ])
+
+
+def claim_jobs(limit):
+    """Mark up to ``limit`` pending jobs RUNNING for this worker and return their ids."""
+    claimed = []
+    candidates = (
+        MediaJob.objects.filter(status=MediaJob.PENDING, next_attempt_at__lte=timezone.now())
+        .order_by('id')
+        .values_list('id', flat=True)[:limit]
+    )
+
+    for job_id in list(candidates):
+        updated = MediaJob.objects.filter(pk=job_id, status=MediaJob.PENDING).update(
+            status=MediaJob.RUNNING,
+            started_at=timezone.now(),
+        )
+        if updated:
+            claimed.append(job_id)
+
+    return claimed
+
+
+def requeue_stale_jobs():
+    """Jobs left RUNNING by a crashed worker go back to the queue."""
+    return MediaJob.objects.filter(
+        status=MediaJob.RUNNING,
+        started_at__lt=timezone.now() - STALE_AFTER,
+    ).update(status=MediaJob.PENDING)
+
+
+def retry_delay(attempts):
+    return min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+
+
+def run_job(job_id):
+    """Process one claimed job. Runs inside a worker process."""
+    job = MediaJob.objects.get(pk=job_id)
+
+    try:
+        model = apps.get_model(job.model_label)
+        instance = model.objects.filter(pk=job.object_id).first()
+        if instance is not None:
+            refresh_renditions(instance, job.field_name)
+    except Exception:
+        job.attempts += 1
+        job.error = traceback.format_exc()
+        job.status = MediaJob.FAILED if job.attempts >= MAX_ATTEMPTS else MediaJob.PENDING
+        job.finished_at = timezone.now()
+        job.next_attempt_at = job.finished_at + retry_delay(job.attempts)
+        job.save(update_fields=['attempts', 'error', 'status', 'finished_at', 'next_attempt_at'])
+        return job_id, job.status
+
+    job.attempts += 1
+    job.status = MediaJob.DONE
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['attempts', 'status', 'error', 'finished_at'])
+
+    return job_id, job.status
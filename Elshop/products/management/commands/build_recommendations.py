@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from products import recommendations
+from products.cache import bump_catalog_version
+
+
+class Command(BaseCommand):
+    help = "Fold newly completed orders into the co-purchase matrix and refresh top-k recommendations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help="Rebuild the matrix from every completed order instead of only new ones.",
+        )
+        parser.add_argument(
+            '--top', type=int, default=recommendations.TOP_K,
+            help="Neighbours kept per product.",
+        )
+
+    def handle(self, *args, **options):
+        orders, products = recommendations.refresh(full=options['full'], k=options['top'])
+
+        if orders:
+            # cached detail pages embed the old rail
+            bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Counted {orders} orders, re-ranked {products} products."
+        ))
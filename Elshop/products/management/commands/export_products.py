@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from products.catalog_io import FIELDS, FORMATS, detect_format, write_rows
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Stream the product catalog to CSV/JSONL (same columns import_products reads)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Output file, or - for stdout.")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension (csv for stdout).")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+
+        rows = (
+            Product.objects.order_by('id')
+            .values_list(*FIELDS)
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        rows = (dict(zip(FIELDS, values)) for values in rows)
+
+        if path == '-':
+            write_rows(sys.stdout, fmt, rows)
+            return
+
+        with open(path, 'w', newline='', encoding='utf-8') as fh:
+            write_rows(fh, fmt, self.count(rows))
+
+        self.stdout.write(self.style.SUCCESS(f"Exported {self.exported} products to {path}."))
+
+    def count(self, rows):
+        self.exported = 0
+        for row in rows:
+            self.exported += 1
+            yield row
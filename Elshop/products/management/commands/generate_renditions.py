@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from mainapp.models import CarouselImage
+from products.models import Product, ProductImage
+from products.renditions import refresh_renditions
+
+
+class Command(BaseCommand):
+    help = "Build responsive WebP/JPEG renditions for product thumbnails, gallery images and carousel images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help="Re-render even when the stored renditions are up to date.",
+        )
+
+    def handle(self, *args, **options):
+        targets = (
+            (Product, 'thumbnail'),
+            (ProductImage, 'img'),
+            (CarouselImage, 'img'),
+        )
+
+        for model, field_name in targets:
+            done = 0
+            queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            for obj in queryset.iterator(chunk_size=200):
+                refresh_renditions(obj, field_name, force=options['force'])
+                done += 1
+            self.stdout.write(f"{model.__name__}.{field_name}: {done} checked")
+
+        self.stdout.write(self.style.SUCCESS("Renditions up to date."))
@@ -0,0 +1,131 @@
+import os
+import time
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from products import search
+from products.cache import bump_catalog_version
+from products.catalog_io import FORMATS, RowError, clean_row, detect_format, read_rows
+from products.jobs import enqueue_renditions_bulk
+from products.models import Product
+from products.suggest import index as suggest_index
+
+UPDATE_FIELDS = ['title', 'desc', 'price', 'discount', 'stock', 'thumbnail', 'updated_at']
+THUMBNAIL_DIR = 'products/thumbnails'
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV/JSONL supplier catalog into Product, creating or updating rows by sku."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSONL file (columns: sku,title,desc,price,discount,stock,thumbnail).")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--images-dir', help="Directory holding the files named in the thumbnail column.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist")
+
+        self.images_dir = options['images_dir']
+        self.batch_size = options['batch_size']
+        fmt = detect_format(path, options['format'])
+
+        self.created = self.updated = self.skipped = 0
+        started = time.monotonic()
+
+        with open(path, newline='', encoding='utf-8') as fh:
+            rows = self.clean_rows(read_rows(fh, fmt))
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                self.save_batch(batch)
+
+                done = self.created + self.updated
+                rate = done / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(f"{done} rows imported ({rate:,.0f} rows/s), {self.skipped} skipped")
+
+        self.after_import()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {self.created}, updated {self.updated}, skipped {self.skipped}."
+        ))
+
+    def clean_rows(self, raw_rows):
+        for number, (row, error) in enumerate(raw_rows, start=1):
+            if error is None:
+                try:
+                    yield clean_row(row)
+                    continue
+                except RowError as e:
+                    error = f"row {number}: {e}"
+            self.skipped += 1
+            self.stderr.write(error)
+
+    def store_thumbnail(self, filename):
+        """Copy an image from --images-dir into media storage; returns the stored name."""
+        if not filename or not self.images_dir:
+            return None
+
+        source = os.path.join(self.images_dir, filename)
+        if not os.path.isfile(source):
+            self.stderr.write(f"image not found: {source}")
+            return None
+
+        with open(source, 'rb') as fh:
+            return default_storage.save(f"{THUMBNAIL_DIR}/{os.path.basename(filename)}", File(fh))
+
+    @transaction.atomic
+    def save_batch(self, batch):
+        # last row wins when a sku repeats inside one batch
+        by_sku = {row['sku']: row for row in batch}
+        existing = Product.objects.in_bulk(list(by_sku), field_name='sku')
+
+        products = []
+        thumbnails = []
+        for sku, row in by_sku.items():
+            thumbnail = self.store_thumbnail(row.pop('thumbnail'))
+            product = Product(**row)
+
+            current = existing.get(sku)
+            if current is not None:
+                product.pk = current.pk
+                product.thumbnail = current.thumbnail
+
+            if thumbnail:
+                product.thumbnail = thumbnail
+                thumbnails.append(product)
+            products.append(product)
+
+        # new skus are plain inserts (pks come back for the rendition jobs);
+        # known ones are rewritten with INSERT ... ON CONFLICT (id) DO UPDATE,
+        # far cheaper than bulk_update's CASE expressions. Bulk writes skip
+        # save() signals: rendition jobs are queued here, batch by batch,
+        # and after_import() catches up on the rest.
+        Product.objects.bulk_create(
+            [p for p in products if p.pk is None],
+            batch_size=self.batch_size,
+        )
+        Product.objects.bulk_create(
+            [p for p in products if p.pk is not None],
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=['id'],
+            update_fields=UPDATE_FIELDS,
+        )
+
+        enqueue_renditions_bulk(thumbnails, 'thumbnail')
+        self.created += len(by_sku) - len(existing)
+        self.updated += len(existing)
+
+    def after_import(self):
+        """Redo what the Product signals would have done row by row."""
+        search.rebuild_index()
+        suggest_index.invalidate()
+        bump_catalog_version()
@@ -0,0 +1,68 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from products.jobs import claim_jobs, requeue_stale_jobs, run_job
+
+
+def _init_worker():
+    import django
+
+    # "spawn" start method: the child has to set Django up itself
+    if not apps.ready:
+        django.setup()
+    # "fork" start method: never share the parent's DB connection
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Drain the media job queue (image renditions) using a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Number of worker processes (default: CPU count).",
+        )
+        parser.add_argument(
+            '--batch', type=int, default=0,
+            help="Jobs claimed per round (default: 2 x workers).",
+        )
+        parser.add_argument(
+            '--poll', type=float, default=2.0,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit when the queue is empty instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        batch = options['batch'] or workers * 2
+
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            while True:
+                # every round, so jobs of a worker that crashed meanwhile
+                # are picked up without a restart
+                requeued = requeue_stale_jobs()
+                if requeued:
+                    self.stdout.write(f"Requeued {requeued} stale jobs.")
+
+                job_ids = claim_jobs(batch)
+
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+
+                for job_id, status in pool.map(run_job, job_ids):
+                    self.stdout.write(f"job {job_id}: {status}")
+
+        self.stdout.write(self.style.SUCCESS("Media queue drained."))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.reservations import SWEEP_BATCH, release_expired
+
+
+class Command(BaseCommand):
+    help = "Return the stock of lapsed cart reservations, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=SWEEP_BATCH,
+            help=f"Holds released per transaction (default: {SWEEP_BATCH}).",
+        )
+        parser.add_argument(
+            '--poll', type=float, default=30.0,
+            help="Seconds to sleep between sweeps.",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Sweep once and exit instead of polling (for cron).",
+        )
+
+    def handle(self, *args, **options):
+        batch = max(options['batch'], 1)
+
+        while True:
+            released = release_expired(batch_size=batch)
+            if released:
+                self.stdout.write(f"Released {released} expired holds.")
+
+            if options['once']:
+                break
+            time.sleep(options['poll'])
+
+        self.stdout.write(self.style.SUCCESS("Expired holds released."))
@@ -1,4 +1,8 @@
 from django.db import models
+from django.contrib.auth.models import User
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
 from decimal import Decimal
 
 # class Category(models.Model):
@@ -8,10 +12,14 @@ from decimal import Decimal
 
 # Create your models here.
 class Product(models.Model):
+    # supplier stock-keeping unit, used to match rows in catalog imports
+    sku = models.CharField(max_length=64, unique=True, blank=True, null=True)
     title = models.CharField(max_length=224)
     desc = models.CharField(max_length=400)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(null=False,blank=False,default=0)
+    # units held by StockReservation rows (see products/reservations.py)
+    reserved = models.PositiveIntegerField(default=0, editable=False)
     thumbnail = models.ImageField(upload_to='products/thumbnails', blank=True, null=True)
     discount = models.DecimalField(
         max_digits=5,
@@ -19,7 +27,51 @@ class Product(models.Model):
         blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # price after discount, computed by the database so listings can
+    # filter and sort on it (same formula as offer_price, rounded to paise)
+    effective_price = models.GeneratedField(
+        expression=Round(
+            F('price') - F('price') * Coalesce(F('discount'), Value(Decimal('0'))) * Value(Decimal('0.01')),
+            2
+        ),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
+
+    # resized WebP/JPEG copies of the thumbnail (see products/renditions.py)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # keyset pagination walks the catalog newest first
+            models.Index(fields=['-created_at', '-id'], name='product_created_id_idx'),
+            # price filters / sort=price
+            models.Index(fields=['effective_price', 'id'], name='product_price_id_idx'),
+        ]
     
+    def save(self, *args, **kwargs):
+        # reserved only ever moves through F() updates in
+        # products/reservations.py; a full save from the admin must not
+        # write back the value it loaded earlier
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and not f.generated and f.name != 'reserved'
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # title as loaded, so signal handlers can tell whether it changed
+        instance._loaded_title = instance.__dict__.get('title')
+        return instance
+
+    @property
+    def available_stock(self):
+        return max(self.stock - self.reserved, 0)
+
     @property
     def offer_price(self):
         if self.discount:
@@ -37,12 +89,18 @@ class ProductImage(models.Model):
     product = models.ForeignKey(Product, 
                                 on_delete=models.CASCADE, 
                                 related_name='images')
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.product.title} image"
+
+    @property
+    def is_processing(self):
+        # renditions are rebuilt by the media worker after each upload
+        return bool(self.img) and (self.renditions or {}).get('source') != self.img.name
     
 class ProductVideo(models.Model):
     title = models.CharField(max_length=200)
@@ -64,3 +122,129 @@ class ProductVideo(models.Model):
     
     def __str__(self):
         return f"{self.product.title} video"
+
+
+class MediaJob(models.Model):
+    """
+    Durable queue of image-processing work, drained by
+    `manage.py process_media_jobs` outside the request cycle.
+    """
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    # target image, e.g. ("products.productimage", 12, "img")
+    model_label = models.CharField(max_length=100)
+    object_id = models.PositiveIntegerField()
+    field_name = models.CharField(max_length=50)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    # failed jobs wait here before they are retried (see products/jobs.py)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='mediajob_status_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label}#{self.object_id}.{self.field_name} ({self.status})"
+
+
+# =========================
+# CO-PURCHASE RECOMMENDATIONS
+# =========================
+# Built by `manage.py build_recommendations` (see products/recommendations.py).
+
+class ProductPairCount(models.Model):
+    """
+    One cell of the sparse co-purchase matrix: how many completed orders
+    contained both products. The diagonal (product == other) holds the
+    number of orders containing the product.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    other = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [['product', 'other']]
+
+
+class ProductRecommendation(models.Model):
+    """Top-k neighbours per product, read by the related-products rail."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = [['product', 'recommended']]
+        indexes = [
+            models.Index(fields=['product', 'rank'], name='product_rec_rank_idx'),
+        ]
+        ordering = ['rank']
+
+
+class RecommendationLedger(models.Model):
+    """Completed orders already counted into ProductPairCount."""
+    order = models.OneToOneField('orders.Order', on_delete=models.CASCADE, related_name='+')
+    counted_at = models.DateTimeField(auto_now_add=True)
+
+
+# =========================
+# STOCK RESERVATIONS
+# =========================
+
+class StockReservation(models.Model):
+    """
+    Units of a product held for one user's cart until ``expires_at``.
+    Product.reserved is always the sum of these quantities; both change
+    together in products/reservations.py.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stock_reservations')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [['user', 'product']]
+        indexes = [
+            # the sweeper walks lapsed holds oldest first
+            models.Index(fields=['expires_at', 'id'], name='reservation_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} held for user {self.user_id} until {self.expires_at}"
+
+
+# =========================
+# CACHE VERSIONS
+# =========================
+
+class CacheVersion(models.Model):
+    """
+    Version stamp behind a family of cache keys (see products/cache.py).
+    Kept in the database because the cache backends' incr() is a plain
+    get + set on most of them, so concurrent bumps could collide.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
@@ -0,0 +1,152 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+# =========================
+# KEYSET (CURSOR) PAGINATION
+# =========================
+# Pages are sliced with a WHERE clause on the ordering columns instead of
+# OFFSET, so fetching page 500 costs the same as fetching page 1.
+
+PAGE_SIZE = 24
+DEFAULT_ORDERING = ('-created_at', '-id')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps([str(v) for v in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(cursor) from e
+    if not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return values
+
+
+def _keyset_filter(model, ordering, values):
+    """
+    (a, b) < (x, y)  ==>  a < x OR (a = x AND b < y)
+    """
+    if len(values) != len(ordering):
+        raise InvalidCursor(values)
+
+    fields = []
+    for spec, raw in zip(ordering, values):
+        name = spec.lstrip('-')
+        field = model._meta.get_field(name)
+        # GeneratedField delegates conversion to its output field
+        field = getattr(field, 'output_field', field)
+        try:
+            value = field.to_python(raw)
+        except ValidationError as e:
+            raise InvalidCursor(values) from e
+        lookup = 'lt' if spec.startswith('-') else 'gt'
+        fields.append((name, lookup, value))
+
+    condition = Q()
+    for i, (name, lookup, value) in enumerate(fields):
+        equal = {prev_name: prev_value for prev_name, _, prev_value in fields[:i]}
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+    return condition
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_paginate(queryset, cursor=None, ordering=DEFAULT_ORDERING, per_page=PAGE_SIZE):
+    """Return one KeysetPage of ``queryset`` starting after ``cursor``."""
+    queryset = queryset.order_by(*ordering)
+
+    if cursor:
+        values = decode_cursor(cursor)
+        queryset = queryset.filter(_keyset_filter(queryset.model, ordering, values))
+
+    # fetch one extra row to know whether another page exists
+    rows = list(queryset[:per_page + 1])
+    object_list = rows[:per_page]
+
+    next_cursor = None
+    if len(rows) > per_page:
+        last = object_list[-1]
+        next_cursor = encode_cursor(
+            getattr(last, spec.lstrip('-')) for spec in ordering
+        )
+
+    return KeysetPage(object_list, next_cursor)
+
+
+# =========================
+# ESTIMATED COUNT PAGINATOR
+# =========================
+# COUNT(*) on a large unfiltered table is a full scan. For the admin
+# changelist an estimate from the database statistics is good enough;
+# filtered/searched querysets still get an exact count.
+
+class EstimatedCountPaginator(Paginator):
+    # below this an exact count is cheap enough
+    EXACT_BELOW = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if getattr(queryset, 'query', None) is None or queryset.query.where:
+            return super().count
+
+        estimate = self.estimate(queryset)
+        if estimate is None or estimate < self.EXACT_BELOW:
+            return super().count
+        return estimate
+
+    @staticmethod
+    def estimate(queryset):
+        model = queryset.model
+        connection = connections[queryset.db]
+        table = model._meta.db_table
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+            elif connection.vendor == 'mysql':
+                cursor.execute(
+                    "SELECT table_rows FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = %s", [table]
+                )
+            elif connection.vendor == 'sqlite':
+                # rowids only grow, so MAX is an upper bound read from the index
+                pk = model._meta.pk.column
+                cursor.execute(f'SELECT MAX("{pk}") FROM "{table}"')
+            else:
+                return None
+            row = cursor.fetchone()
+
+        if not row or row[0] is None or row[0] < 0:
+            return None
+        return int(row[0])
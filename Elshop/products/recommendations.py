@@ -0,0 +1,162 @@
+import math
+from collections import defaultdict
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import ProductPairCount, ProductRecommendation, RecommendationLedger
+
+
+# =========================
+# CO-PURCHASE RECOMMENDATIONS
+# =========================
+# Completed orders are folded into a sparse product x product
+# co-occurrence matrix (ProductPairCount). For every product the top-k
+# neighbours by cosine similarity
+#
+#     score(a, b) = together(a, b) / sqrt(orders(a) * orders(b))
+#
+# are written to ProductRecommendation, so the rail is one indexed lookup.
+# Incremental runs only count orders missing from RecommendationLedger and
+# only re-rank the products whose row of the matrix changed, plus their
+# neighbours: a neighbour's scores divide by orders(b) of the changed
+# products, so it has to be re-ranked too to match a --full rebuild.
+
+TOP_K = 8
+BATCH_SIZE = 1000
+
+
+def _completed_order_lines(exclude_counted):
+    from orders.models import OrderDetails
+
+    lines = OrderDetails.objects.filter(order__status='COMPLETED')
+    if exclude_counted:
+        lines = lines.exclude(order_id__in=RecommendationLedger.objects.values('order_id'))
+
+    return lines.order_by('order_id').values_list('order_id', 'order_item_id').iterator(chunk_size=BATCH_SIZE)
+
+
+def count_pairs(exclude_counted=True):
+    """
+    Return (delta, order_ids): sparse {a: {b: n}} co-occurrence counts
+    (diagonal included) for completed orders not yet counted.
+    """
+    delta = defaultdict(lambda: defaultdict(int))
+    order_ids = []
+
+    for order_id, rows in groupby(_completed_order_lines(exclude_counted), key=lambda r: r[0]):
+        items = {product_id for _, product_id in rows}
+        order_ids.append(order_id)
+        for a in items:
+            for b in items:
+                delta[a][b] += 1
+
+    return delta, order_ids
+
+
+def apply_pair_counts(delta):
+    """Add ``delta`` into ProductPairCount with batched updates/inserts."""
+    for a, row in delta.items():
+        existing = {
+            pc.other_id: pc
+            for pc in ProductPairCount.objects.filter(product_id=a, other_id__in=list(row))
+        }
+
+        to_update = []
+        to_create = []
+        for b, n in row.items():
+            if b in existing:
+                pc = existing[b]
+                pc.count = F('count') + n
+                to_update.append(pc)
+            else:
+                to_create.append(ProductPairCount(product_id=a, other_id=b, count=n))
+
+        if to_update:
+            ProductPairCount.objects.bulk_update(to_update, ['count'], batch_size=BATCH_SIZE)
+        if to_create:
+            ProductPairCount.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+
+
+def _chunked(ids, size=BATCH_SIZE):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def affected_products(changed):
+    """``changed`` plus every product ranking one of them (the matrix is symmetric)."""
+    affected = set(changed)
+    for chunk in _chunked(changed):
+        affected.update(
+            ProductPairCount.objects.filter(product_id__in=chunk).values_list('other_id', flat=True)
+        )
+    return affected
+
+
+def rank_neighbours(product_ids, k=TOP_K):
+    """Recompute the top-k ProductRecommendation rows for ``product_ids``, BATCH_SIZE products at a time."""
+    return sum(_rank_chunk(chunk, k) for chunk in _chunked(product_ids))
+
+
+def _rank_chunk(product_ids, k):
+    rows = defaultdict(dict)
+    pairs = ProductPairCount.objects.filter(product_id__in=product_ids).values_list('product_id', 'other_id', 'count')
+    for a, b, n in pairs.iterator(chunk_size=BATCH_SIZE):
+        rows[a][b] = n
+
+    # orders(b) for every neighbour, read from the matrix diagonal
+    neighbours = {b for row in rows.values() for b in row}
+    totals = {}
+    for chunk in _chunked(neighbours):
+        totals.update(
+            ProductPairCount.objects.filter(product_id__in=chunk, other_id=F('product_id'))
+            .values_list('product_id', 'count')
+        )
+
+    recommendations = []
+    for a, row in rows.items():
+        own = row.get(a) or totals.get(a) or 0
+        scored = [
+            (n / math.sqrt(own * totals[b]), b)
+            for b, n in row.items()
+            if b != a and own and totals.get(b)
+        ]
+        scored.sort(key=lambda s: (-s[0], s[1]))
+
+        for rank, (score, b) in enumerate(scored[:k], start=1):
+            recommendations.append(
+                ProductRecommendation(product_id=a, recommended_id=b, score=score, rank=rank)
+            )
+
+    ProductRecommendation.objects.filter(product_id__in=product_ids).delete()
+    ProductRecommendation.objects.bulk_create(recommendations, batch_size=BATCH_SIZE)
+    return len(recommendations)
+
+
+@transaction.atomic
+def refresh(full=False, k=TOP_K):
+    """
+    Fold newly completed orders into the matrix and re-rank affected
+    products. ``full`` rebuilds everything from scratch.
+    Returns (orders_counted, products_ranked).
+    """
+    if full:
+        ProductPairCount.objects.all().delete()
+        ProductRecommendation.objects.all().delete()
+        RecommendationLedger.objects.all().delete()
+
+    delta, order_ids = count_pairs(exclude_counted=not full)
+    if not order_ids:
+        return 0, 0
+
+    apply_pair_counts(delta)
+    RecommendationLedger.objects.bulk_create(
+        [RecommendationLedger(order_id=order_id) for order_id in order_ids],
+        batch_size=BATCH_SIZE
+    )
+
+    affected = affected_products(delta.keys())
+    rank_neighbours(affected, k=k)
+    return len(order_ids), len(affected)
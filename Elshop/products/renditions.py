@@ -0,0 +1,140 @@
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.dispatch import Signal
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# RESPONSIVE IMAGE RENDITIONS
+# =========================
+# Each uploaded image is resized to a few widths and saved as WebP plus a
+# JPEG fallback next to the original under renditions/. What was written is
+# recorded on the model in a JSON field:
+#
+#   {"source": "product/images/a.jpeg",
+#    "webp": [[320, "renditions/product/images/a-320.webp"], ...],
+#    "jpeg": [[320, "renditions/product/images/a-320.jpg"], ...]}
+#
+# so templates can emit srcset without touching the storage.
+
+WIDTHS = (320, 640, 1024, 1600)
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+RENDITIONS_DIR = 'renditions'
+
+# sent with (sender=model, instance) after renditions were written with
+# queryset.update(), which does not fire post_save
+renditions_updated = Signal()
+
+
+def rendition_name(source_name, width, ext):
+    stem, _ = posixpath.splitext(source_name)
+    return f"{RENDITIONS_DIR}/{stem}-{width}.{ext}"
+
+
+def target_widths(original_width, widths=WIDTHS):
+    """Never upscale; an image narrower than every width gets one copy at its own size."""
+    chosen = [w for w in widths if w < original_width]
+    if not chosen or original_width <= widths[-1]:
+        chosen.append(min(original_width, widths[-1]))
+    return sorted(set(chosen))
+
+
+def build_renditions(field_file, widths=WIDTHS):
+    """Render every width/format for ``field_file``. Returns the dict to store on the model."""
+    storage = field_file.storage
+    source_name = field_file.name
+
+    try:
+        with storage.open(source_name, 'rb') as fh:
+            image = Image.open(fh)
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, UnidentifiedImageError):
+        # recorded as done (no renditions) so the original keeps being served
+        logger.warning("Could not open %s for renditions", source_name)
+        return {'source': source_name}
+
+    result = {'source': source_name}
+    for key in FORMATS:
+        result[key] = []
+
+    for width in target_widths(image.width, widths):
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+
+        for key, (pil_format, ext, options) in FORMATS.items():
+            frame = resized
+            if pil_format == 'JPEG' and frame.mode != 'RGB':
+                frame = frame.convert('RGB')
+            elif pil_format == 'WEBP' and frame.mode not in ('RGB', 'RGBA'):
+                frame = frame.convert('RGBA' if 'A' in frame.getbands() else 'RGB')
+
+            buffer = BytesIO()
+            frame.save(buffer, pil_format, **options)
+
+            name = rendition_name(source_name, width, ext)
+            if storage.exists(name):
+                storage.delete(name)
+            saved = storage.save(name, ContentFile(buffer.getvalue()))
+            result[key].append([width, saved])
+
+    return result
+
+
+def delete_renditions(renditions, storage):
+    for key in FORMATS:
+        for _, name in renditions.get(key, []):
+            if storage.exists(name):
+                storage.delete(name)
+
+
+def is_current(instance, field_name):
+    field_file = getattr(instance, field_name)
+    return (instance.renditions or {}).get('source') == field_file.name
+
+
+def refresh_renditions(instance, field_name, force=False):
+    """
+    (Re)build renditions for ``instance.<field_name>`` if the source file
+    changed since they were last rendered. Writes with queryset.update()
+    so the model's post_save signals do not fire again.
+    """
+    field_file = getattr(instance, field_name)
+    current = instance.renditions or {}
+
+    if not field_file:
+        if current:
+            delete_renditions(current, field_file.storage)
+            type(instance).objects.filter(pk=instance.pk).update(renditions={})
+            instance.renditions = {}
+            renditions_updated.send(sender=type(instance), instance=instance)
+        return instance.renditions
+
+    if not force and is_current(instance, field_name):
+        return current
+
+    if current:
+        delete_renditions(current, field_file.storage)
+
+    renditions = build_renditions(field_file)
+    type(instance).objects.filter(pk=instance.pk).update(renditions=renditions)
+    instance.renditions = renditions
+    renditions_updated.send(sender=type(instance), instance=instance)
+    return renditions
+
+
+def srcset(renditions, key):
+    """'url 320w, url 640w' for one format, or '' when nothing was rendered."""
+    return ', '.join(
+        f"{default_storage.url(name)} {width}w"
+        for width, name in (renditions or {}).get(key, [])
+    )
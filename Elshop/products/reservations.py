@@ -0,0 +1,155 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Product, StockReservation
+
+
+# =========================
+# STOCK RESERVATIONS
+# =========================
+# A hold moves units of a product into Product.reserved for HOLD_TTL, so
+# available stock is just ``stock - reserved`` read off the product row.
+# Every hold change is a conditional F() UPDATE on the product
+# (reserved + n <= stock) paired with the same change on the user's
+# StockReservation row in one transaction: concurrent shoppers can never
+# hold more than the stock, and Product.reserved stays equal to the sum of
+# the rows.
+#
+# Lapsed holds keep counting until `manage.py release_expired_holds`
+# hands them back, so run it every minute or so during a sale.
+
+HOLD_TTL = timedelta(minutes=15)
+SWEEP_BATCH = 500
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id, available):
+        super().__init__(product_id, available)
+        self.product_id = product_id
+        self.available = available
+
+
+def available_stock(product_id):
+    """stock - reserved for one product, or None if it does not exist."""
+    row = Product.objects.filter(pk=product_id).values_list('stock', 'reserved').first()
+    if row is None:
+        return None
+    return max(row[0] - row[1], 0)
+
+
+def _reserve(product_id, quantity):
+    return Product.objects.filter(
+        pk=product_id,
+        stock__gte=F('reserved') + quantity,
+    ).update(reserved=F('reserved') + quantity)
+
+
+def _unreserve(product_id, quantity):
+    Product.objects.filter(
+        pk=product_id,
+        reserved__gte=quantity,
+    ).update(reserved=F('reserved') - quantity)
+
+
+def _extend(holds, quantity, expires_at):
+    return holds.update(
+        quantity=F('quantity') + quantity,
+        expires_at=expires_at,
+        updated_at=timezone.now(),
+    )
+
+
+@transaction.atomic
+def hold(user, product_id, quantity=1):
+    """
+    Hold ``quantity`` more units of a product for ``user`` and restart the
+    hold's TTL. Raises InsufficientStock when fewer units are available.
+    """
+    if quantity <= 0:
+        return
+    if not _reserve(product_id, quantity):
+        raise InsufficientStock(product_id, available_stock(product_id) or 0)
+
+    expires_at = timezone.now() + HOLD_TTL
+    holds = StockReservation.objects.filter(user=user, product_id=product_id)
+    if _extend(holds, quantity, expires_at):
+        return
+    try:
+        with transaction.atomic():
+            StockReservation.objects.create(
+                user=user, product_id=product_id, quantity=quantity, expires_at=expires_at
+            )
+    except IntegrityError:
+        # created by a concurrent request in the meantime
+        _extend(holds, quantity, expires_at)
+
+
+@transaction.atomic
+def release(user, product_id, quantity=None):
+    """Give back ``quantity`` held units (all by default). Returns the units released."""
+    row = StockReservation.objects.filter(
+        user=user, product_id=product_id
+    ).values_list('id', 'quantity').first()
+    if row is None:
+        return 0
+
+    pk, held = row
+    quantity = held if quantity is None else min(quantity, held)
+    if quantity <= 0:
+        return 0
+
+    # conditional on the quantity read above, so a concurrent change or
+    # the sweeper can never make us release the same units twice
+    if quantity == held:
+        done, _ = StockReservation.objects.filter(pk=pk, quantity=held).delete()
+    else:
+        done = StockReservation.objects.filter(pk=pk, quantity__gte=quantity).update(
+            quantity=F('quantity') - quantity
+        )
+    if not done:
+        return 0
+
+    _unreserve(product_id, quantity)
+    return quantity
+
+
+def release_expired(batch_size=SWEEP_BATCH, now=None):
+    """Delete lapsed holds in batches and return their units. Returns the number of holds."""
+    now = now or timezone.now()
+    released = 0
+
+    while True:
+        with transaction.atomic():
+            # locked so a concurrent hold/release waits for this batch
+            rows = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lt=now)
+                .order_by('expires_at', 'id')
+                .values_list('id', 'product_id', 'quantity')[:batch_size]
+            )
+            if not rows:
+                break
+
+            # each delete is conditional on the hold still being lapsed with
+            # the quantity read above (on backends without row locks a
+            # concurrent hold() may have extended it), and only the holds
+            # actually deleted hand their units back
+            per_product = defaultdict(int)
+            for pk, product_id, quantity in rows:
+                done, _ = StockReservation.objects.filter(
+                    pk=pk, expires_at__lt=now, quantity=quantity
+                ).delete()
+                if done:
+                    per_product[product_id] += quantity
+                    released += 1
+            for product_id, quantity in per_product.items():
+                _unreserve(product_id, quantity)
+
+        if len(rows) < batch_size:
+            break
+
+    return released
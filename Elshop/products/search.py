@@ -0,0 +1,144 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Product
+from .pagination import PAGE_SIZE
+
+
+# =========================
+# FULL-TEXT PRODUCT SEARCH
+# =========================
+# On SQLite the catalog is mirrored into an FTS5 virtual table (rowid =
+# product id) and ranked with BM25. The table lives outside the Django
+# models, so it is created on first use and can be rebuilt with
+# `manage.py rebuild_search_index`. Other databases fall back to the old
+# icontains filter.
+
+FTS_TABLE = 'products_product_fts'
+
+# title matches weigh more than description matches
+TITLE_WEIGHT = 10.0
+DESC_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_index_ready = False
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def ensure_index():
+    """Create (and fill) the FTS table the first time it is needed."""
+    global _index_ready
+    if _index_ready or not fts_enabled():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE]
+        )
+        exists = cursor.fetchone() is not None
+
+    if not exists:
+        rebuild_index()
+
+    _index_ready = True
+
+
+def rebuild_index():
+    """Drop and repopulate the FTS table from the Product table. Returns the row count."""
+    global _index_ready
+    if not fts_enabled():
+        return 0
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "title, description, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description) "
+            f"SELECT id, title, \"desc\" FROM {Product._meta.db_table}"
+        )
+        count = cursor.rowcount
+
+    _index_ready = True
+    return count
+
+
+def index_product(product):
+    if not fts_enabled():
+        return
+    ensure_index()
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (%s, %s, %s)",
+            [product.pk, product.title, product.desc]
+        )
+
+
+def remove_product(product_id):
+    if not fts_enabled():
+        return
+    ensure_index()
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+
+def build_match_query(query):
+    """
+    Turn free text into a safe FTS5 expression: every word is quoted
+    (so operators typed by users are literal) and the last word is a
+    prefix match, e.g. 'god of wa' -> '"god" "of" "wa"*'.
+    """
+    tokens = _TOKEN_RE.findall(query or '')
+    if not tokens:
+        return None
+
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_products(query, page=1, per_page=PAGE_SIZE):
+    """
+    Return (products, has_next) for one page of ranked search results.
+    """
+    offset = (page - 1) * per_page
+
+    if not fts_enabled():
+        results = Product.objects.filter(
+            Q(title__icontains=query) |
+            Q(desc__icontains=query)
+        ).order_by('-created_at', '-id')[offset:offset + per_page + 1]
+        results = list(results)
+        return results[:per_page], len(results) > per_page
+
+    match = build_match_query(query)
+    if match is None:
+        return [], False
+
+    ensure_index()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, %s, %s) LIMIT %s OFFSET %s",
+            [match, TITLE_WEIGHT, DESC_WEIGHT, per_page + 1, offset]
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+
+    has_next = len(ids) > per_page
+    ids = ids[:per_page]
+
+    products = Product.objects.in_bulk(ids)
+    return [products[pk] for pk in ids if pk in products], has_next
@@ -0,0 +1,72 @@
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.dispatch import receiver
+
+from .models import Product, ProductImage, ProductVideo
+from . import search
+from .suggest import index as suggest_index
+from .renditions import delete_renditions, renditions_updated
+from .cache import bump_catalog_version, invalidate_product_detail
+from .jobs import enqueue_renditions
+
+
+# keep the full-text and autocomplete indexes in step with the catalog
+
+@receiver(post_save, sender=Product)
+def index_product_for_search(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_product(instance)
+    # most saves (stock, price, media) leave the title alone
+    if kwargs.get('created') or instance.title != getattr(instance, '_loaded_title', None):
+        suggest_index.update(instance.pk, instance.title)
+        instance._loaded_title = instance.title
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_search(sender, instance, **kwargs):
+    search.remove_product(instance.pk)
+    suggest_index.remove(instance.pk)
+
+
+# responsive image renditions (rendered by the media worker)
+
+@receiver(post_save, sender=Product)
+def render_product_thumbnail(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    enqueue_renditions(instance, 'thumbnail')
+
+
+@receiver(post_save, sender=ProductImage)
+def render_product_image(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    enqueue_renditions(instance, 'img')
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=ProductImage)
+def delete_image_renditions(sender, instance, **kwargs):
+    field_file = instance.thumbnail if sender is Product else instance.img
+    delete_renditions(instance.renditions or {}, field_file.storage)
+
+
+# product detail cache
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(renditions_updated, sender=Product)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    # after commit, so nothing recomputed meanwhile is cached under the
+    # new version with the old data
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(renditions_updated, sender=ProductImage)
+@receiver(post_save, sender=ProductVideo)
+@receiver(post_delete, sender=ProductVideo)
+def invalidate_product_media_cache(sender, instance, **kwargs):
+    invalidate_product_detail(instance.product_id)
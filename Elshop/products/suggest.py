@@ -0,0 +1,178 @@
+import re
+import threading
+
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+
+from .cache import next_version, read_version
+from .models import Product
+
+
+# =========================
+# SEARCH-AS-YOU-TYPE INDEX
+# =========================
+# Every word of every product title is expanded into its prefixes and
+# kept in a per-process dict, so a suggestion lookup is a few set
+# intersections plus one read of the index's version stamp.
+#
+# Workers stay consistent through that stamp (a database counter, see
+# products/cache.py, so concurrent changes always get distinct versions).
+# Once a title change commits, the stamp is bumped and the change itself
+# is stored in the shared cache under the new version; other workers
+# replay the changes they missed on their next lookup. Only a bulk
+# invalidate() or a change missing from the cache makes a worker rebuild
+# from the database. The web entry points warm the index at startup (see
+# Elshop/wsgi.py).
+
+VERSION_NAME = 'products:suggest'
+CHANGE_TIMEOUT = 60 * 60 * 24
+# further behind than this, a rebuild is cheaper than a replay
+MAX_REPLAY = 500
+MAX_PREFIX = 12
+MAX_RESULTS = 8
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _words(text):
+    return _WORD_RE.findall((text or '').lower())
+
+
+def _prefixes(word):
+    return [word[:i] for i in range(1, min(len(word), MAX_PREFIX) + 1)]
+
+
+def current_version():
+    return read_version(VERSION_NAME)
+
+
+def change_key(version):
+    return f'products:suggest:change:{version}'
+
+
+def bump_version():
+    return next_version(VERSION_NAME)
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prefixes = {}
+        self._titles = {}
+        self.version = None
+
+    # ---- BUILD ----
+    def rebuild(self):
+        version = current_version()
+        prefixes = {}
+        titles = {}
+
+        for pk, title in Product.objects.values_list('id', 'title').iterator():
+            titles[pk] = title
+            for word in _words(title):
+                for prefix in _prefixes(word):
+                    prefixes.setdefault(prefix, set()).add(pk)
+
+        with self._lock:
+            self._prefixes = prefixes
+            self._titles = titles
+            self.version = version
+
+    def warm(self):
+        """Build the index at process start; left to the first lookup if the DB is not ready."""
+        try:
+            self.rebuild()
+        except DatabaseError:
+            pass
+
+    def ensure_current(self):
+        latest = current_version()
+        start = self.version
+        if start == latest:
+            return
+
+        if start is not None and 0 < latest - start <= MAX_REPLAY:
+            keys = [change_key(version) for version in range(start + 1, latest + 1)]
+            changes = cache.get_many(keys)
+            if len(changes) == len(keys):
+                with self._lock:
+                    if self.version == start:
+                        for key in keys:
+                            self._change(*changes[key])
+                        self.version = latest
+                return
+
+        self.rebuild()
+
+    # ---- INCREMENTAL UPDATES ----
+    def _discard(self, pk):
+        title = self._titles.pop(pk, None)
+        if title is None:
+            return
+        for word in _words(title):
+            for prefix in _prefixes(word):
+                ids = self._prefixes.get(prefix)
+                if ids is not None:
+                    ids.discard(pk)
+                    if not ids:
+                        del self._prefixes[prefix]
+
+    def _change(self, pk, title):
+        """Set ``pk``'s title (None removes it). Idempotent, so replays are safe."""
+        self._discard(pk)
+        if title is None:
+            return
+        self._titles[pk] = title
+        for word in _words(title):
+            for prefix in _prefixes(word):
+                self._prefixes.setdefault(prefix, set()).add(pk)
+
+    def _publish(self, pk, title):
+        version = bump_version()
+        cache.set(change_key(version), (pk, title), CHANGE_TIMEOUT)
+        with self._lock:
+            if self.version is not None and version == self.version + 1:
+                self._change(pk, title)
+                self.version = version
+            # otherwise the next lookup replays or rebuilds
+
+    def update(self, pk, title):
+        """Record a new title; takes effect once the current transaction commits."""
+        transaction.on_commit(lambda: self._publish(pk, title))
+
+    def remove(self, pk):
+        transaction.on_commit(lambda: self._publish(pk, None))
+
+    def invalidate(self):
+        """After bulk changes that skip signals: every worker rebuilds on next lookup."""
+        def bump():
+            bump_version()
+            with self._lock:
+                self.version = None
+
+        transaction.on_commit(bump)
+
+    # ---- LOOKUP ----
+    def suggest(self, query, limit=MAX_RESULTS):
+        words = [w[:MAX_PREFIX] for w in _words(query)]
+        if not words:
+            return []
+
+        self.ensure_current()
+
+        with self._lock:
+            matches = None
+            for word in words:
+                ids = self._prefixes.get(word, set())
+                matches = ids.copy() if matches is None else matches & ids
+                if not matches:
+                    return []
+            results = [(pk, self._titles[pk]) for pk in matches]
+
+        # titles starting with the query first, then shorter titles
+        needle = ' '.join(words)
+        results.sort(key=lambda r: (not r[1].lower().startswith(needle), len(r[1]), r[1]))
+        return results[:limit]
+
+
+index = PrefixIndex()
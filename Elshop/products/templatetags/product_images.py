@@ -0,0 +1,40 @@
+from django import template
+
+from products.renditions import srcset
+
+register = template.Library()
+
+
+@register.inclusion_tag('products/includes/picture.html')
+def picture(obj, field_name, sizes='100vw', css_class='', alt='', loading='lazy'):
+    """
+    <picture> with WebP and JPEG srcsets from ``obj.renditions``; falls back
+    to the original upload when no renditions exist yet.
+
+        {% picture product 'thumbnail' sizes='(min-width: 992px) 25vw, 100vw' %}
+    """
+    field_file = getattr(obj, field_name)
+    if not field_file:
+        return {'src': None}
+
+    renditions = getattr(obj, 'renditions', None) or {}
+
+    # renditions of an older upload are ignored until rebuilt
+    if renditions.get('source') != field_file.name:
+        renditions = {}
+
+    jpeg = renditions.get('jpeg') or []
+    if jpeg:
+        src = field_file.storage.url(jpeg[-1][1])
+    else:
+        src = field_file.url
+
+    return {
+        'src': src,
+        'webp_srcset': srcset(renditions, 'webp'),
+        'jpeg_srcset': srcset(renditions, 'jpeg'),
+        'sizes': sizes,
+        'css_class': css_class,
+        'alt': alt,
+        'loading': loading,
+    }
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .views import productsView, searchProducts
+from .views import productsView, productsPage, searchProducts, suggestProducts
 
 from .views import (
     CreateProduct, ProductDetail, UpdateProduct, DeleteProduct,AddImages
@@ -14,8 +14,10 @@ from .views import(
 urlpatterns = [
     path('',productsView,name='products'),
     path('all/', productsView, name = 'products_all'),
+    path('page/', productsPage, name='products_page'),
     
     path('search', searchProducts, name='search_products'),
+    path('suggest', suggestProducts, name='suggest_products'),
     
     path('add/',CreateProduct.as_view(), name="add_product"),
     path('<int:pk>/', ProductDetail.as_view(), name='product_details'),
@@ -1,33 +1,130 @@
 from django.shortcuts import render, redirect
 from django.urls import reverse
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from decimal import Decimal, InvalidOperation
 from .models import Product
+from .pagination import keyset_paginate, InvalidCursor, DEFAULT_ORDERING
 
 # Create your views here.
 
+SORT_ORDERINGS = {
+    'price' : ('effective_price', 'id'),
+    '-price' : ('-effective_price', '-id'),
+}
+
+def _price_param(request, name):
+    try:
+        value = Decimal(request.GET[name])
+    except (KeyError, InvalidOperation):
+        return None
+    # NaN/Infinity cannot be compared against a DecimalField
+    return value if value.is_finite() else None
+
+def filtered_products(request):
+    """Catalog queryset and keyset ordering for ?min_price=&max_price=&sort=."""
+    queryset = Product.objects.all()
+
+    min_price = _price_param(request, 'min_price')
+    max_price = _price_param(request, 'max_price')
+    if min_price is not None:
+        queryset = queryset.filter(effective_price__gte=min_price)
+    if max_price is not None:
+        queryset = queryset.filter(effective_price__lte=max_price)
+
+    ordering = SORT_ORDERINGS.get(request.GET.get('sort'), DEFAULT_ORDERING)
+    return queryset, ordering
+
+def product_page(request):
+    queryset, ordering = filtered_products(request)
+    return keyset_paginate(queryset, request.GET.get('cursor'), ordering=ordering)
+
+def product_listing(request):
+    """Keyset-paginated catalog page plus the links to fetch the next one."""
+    try:
+        page = product_page(request)
+    except InvalidCursor:
+        queryset, ordering = filtered_products(request)
+        page = keyset_paginate(queryset, ordering=ordering)
+
+    context = {
+        'products' : page,
+        'next_page_url' : None,
+        'more_url' : None,
+        'min_price' : request.GET.get('min_price', ''),
+        'max_price' : request.GET.get('max_price', ''),
+        'sort' : request.GET.get('sort', ''),
+    }
+
+    if page.has_next:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        query = params.urlencode()
+        context['next_page_url'] = f"{request.path}?{query}"
+        context['more_url'] = f"{reverse('products_page')}?{query}"
+
+    return context
+
 def productsView(request):
     template = 'products/products.html'
     context = {
-        'products' : Product.objects.all(),
         'current_page' : 'products'
     }
+    context.update(product_listing(request))
     
     return render (request, template, context)
 
+# next page for infinite scroll (JSON)
+
+def productsPage(request):
+    try:
+        page = product_page(request)
+    except InvalidCursor:
+        return JsonResponse({'error': 'invalid_cursor'}, status=400)
+
+    html = render_to_string(
+        'products/includes/productCards.html',
+        {'products': page},
+        request=request
+    )
+
+    next_url = None
+    if page.has_next:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        next_url = f"{request.path}?{params.urlencode()}"
+
+    return JsonResponse({
+        'html': html,
+        'next_cursor': page.next_cursor,
+        'next_url': next_url,
+        'has_next': page.has_next
+    })
+
 # search product
-from django.db.models import Q
+from .search import search_products
 
 def searchProducts(request):
     template = 'products/search_results.html'
     query = request.GET.get('q')
     if query:
-        search_results = Product.objects.filter(
-            Q(title__icontains = query) |
-            Q(desc__icontains = query)
-        )
-        
+        try:
+            page_number = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page_number = 1
+
+        search_results, has_next = search_products(query, page=page_number)
+
+        next_page_url = None
+        if has_next:
+            params = request.GET.copy()
+            params['page'] = page_number + 1
+            next_page_url = f"{request.path}?{params.urlencode()}"
+
         context = {
             'query' : query,
-            'products' : search_results
+            'products' : search_results,
+            'next_page_url' : next_page_url
         }
     else :
         context = {
@@ -37,6 +134,26 @@ def searchProducts(request):
         
     return render(request, template, context)
 
+# search-as-you-type suggestions (served from memory)
+from .suggest import index as suggest_index
+
+def suggestProducts(request):
+    query = request.GET.get('q', '')
+    results = suggest_index.suggest(query)
+
+    return JsonResponse({
+        'query': query,
+        'version': suggest_index.version,
+        'results': [
+            {
+                'id': pk,
+                'title': title,
+                'url': reverse('product_details', args=[pk])
+            }
+            for pk, title in results
+        ]
+    })
+
 # CURD operations using Generic Class Bases Views of Django
 
 from django.views.generic import (
@@ -53,21 +170,26 @@ class CreateProduct(CreateView):
     
     success_url = '/'
     
+from django.http import Http404
+from .cache import get_product_detail
+
 class ProductDetail(DetailView):
     model = Product
     template_name = 'products/product_details.html'
     context_object_name = 'product'
 
-    def get_queryset(self):
-        return Product.objects.prefetch_related('images')
+    def get_object(self, queryset=None):
+        # product + images + videos + related rail, cached per product
+        self.detail = get_product_detail(self.kwargs['pk'])
+        if self.detail is None:
+            raise Http404("No product found")
+        return self.detail['product']
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
         # show other products except current one
-        context['products'] = Product.objects.exclude(
-            id=self.object.id
-        )[:8]  # limit to 8 products
+        context['products'] = self.detail['related']
 
         return context
 
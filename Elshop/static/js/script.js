@@ -242,6 +242,7 @@ document.addEventListener('DOMContentLoaded', function () {
     initCartAnimations();
     initSearchEffects();
     initStockUI();
+    hydrateCartQuantities();
 });
 
 /* =====================================================
@@ -301,85 +302,18 @@ function initCartAnimations() {
 
         if (!cartSection) return;
 
-        const plusUrl = cartSection.dataset.plusUrl;
-        const minusUrl = cartSection.dataset.minusUrl;
         const removeUrl = cartSection.dataset.removeUrl;
 
         // Get CSRF token
         const csrftoken = getCookie("csrftoken");
 
-        // Increase quantity
-        if (e.target.classList.contains("qty-plus")) {
-            const btn = e.target;
-            btn.classList.add('loading');
-            btn.innerHTML = '<span class="loading"></span>';
-
-            fetch(plusUrl, {
-                method: "POST",
-                headers: {
-                    "X-CSRFToken": csrftoken,
-                    "Content-Type": "application/x-www-form-urlencoded"
-                },
-                body: `product_id=${productId}`
-            })
-                .then(res => res.json())
-                .then(data => {
-                    const qtyEl = cartItem.querySelector(".qty");
-                    const subtotalEl = cartItem.querySelector(".subtotal");
-                    qtyEl.innerText = data.quantity;
-                    subtotalEl.innerText = "₹" + parseFloat(data.subtotal).toFixed(2);
-                    animateUpdate(qtyEl);
-                    updateOrderSummary(data.total_qty, data.total_price);
-                    updateCartBadge(data.cart_count);
-                    
-                    // Update localStorage and UI
-                    setCartQuantity(productId, data.quantity);
-                    updateProductUI(productId);
-                })
-                .finally(() => {
-                    btn.classList.remove('loading');
-                    btn.innerHTML = '+';
-                });
-        }
-
-        // Decrease quantity
-        if (e.target.classList.contains("qty-minus")) {
-            const btn = e.target;
-            btn.classList.add('loading');
-            btn.innerHTML = '<span class="loading"></span>';
-
-            fetch(minusUrl, {
-                method: "POST",
-                headers: {
-                    "X-CSRFToken": csrftoken,
-                    "Content-Type": "application/x-www-form-urlencoded"
-                },
-                body: `product_id=${productId}`
-            })
-                .then(res => res.json())
-                .then(data => {
-                    if (data.deleted) {
-                        animateRemove(cartItem);
-                        // Update localStorage and UI
-                        removeFromCartStorage(productId);
-                        updateProductUI(productId);
-                    } else {
-                        const qtyEl = cartItem.querySelector(".qty");
-                        const subtotalEl = cartItem.querySelector(".subtotal");
-                        qtyEl.innerText = data.quantity;
-                        subtotalEl.innerText = "₹" + parseFloat(data.subtotal).toFixed(2);
-                        animateUpdate(qtyEl);
-                        // Update localStorage and UI
-                        setCartQuantity(productId, data.quantity);
-                        updateProductUI(productId);
-                    }
-                    updateOrderSummary(data.total_qty, data.total_price);
-                    updateCartBadge(data.cart_count);
-                })
-                .finally(() => {
-                    btn.classList.remove('loading');
-                    btn.innerHTML = '-';
-                });
+        // Increase / decrease quantity: shown at once, sent in one debounced batch
+        if (e.target.classList.contains("qty-plus") || e.target.classList.contains("qty-minus")) {
+            const delta = e.target.classList.contains("qty-plus") ? 1 : -1;
+            const qtyEl = cartItem.querySelector(".qty");
+            qtyEl.innerText = Math.max(0, parseInt(qtyEl.innerText || 0) + delta);
+            animateUpdate(qtyEl);
+            queueCartChange(cartSection.dataset.batchUrl, productId, delta);
         }
 
         // Remove item
@@ -387,6 +321,8 @@ function initCartAnimations() {
             const btn = e.target;
             btn.classList.add('loading');
 
+            delete cartBatch.pending[productId];
+
             fetch(removeUrl, {
                 method: "POST",
                 headers: {
@@ -412,6 +348,94 @@ function initCartAnimations() {
     });
 }
 
+// Batched +/- clicks: deltas pile up per product and go out as one request
+const CART_BATCH_DELAY = 400;
+const cartBatch = { pending: {}, timer: null, url: null };
+
+function queueCartChange(batchUrl, productId, delta) {
+    cartBatch.url = batchUrl;
+    cartBatch.pending[productId] = (cartBatch.pending[productId] || 0) + delta;
+    clearTimeout(cartBatch.timer);
+    cartBatch.timer = setTimeout(flushCartBatch, CART_BATCH_DELAY);
+}
+
+async function flushCartBatch() {
+    const ops = Object.entries(cartBatch.pending)
+        .filter(([, delta]) => delta !== 0)
+        .map(([productId, delta]) => ({ product_id: productId, op: 'add', quantity: delta }));
+    cartBatch.pending = {};
+    if (!ops.length) return;
+
+    try {
+        const response = await fetch(cartBatch.url, {
+            method: "POST",
+            headers: {
+                "X-CSRFToken": getCookie("csrftoken"),
+                "Content-Type": "application/json"
+            },
+            body: JSON.stringify({ ops: ops })
+        });
+        const data = await response.json();
+
+        if (!response.ok) {
+            showNotification(data.message || 'Cart update failed', 'danger');
+            return;
+        }
+
+        data.items.forEach(item => {
+            const cartItem = document.querySelector(`#cart-page .cart-item[data-product-id="${item.product_id}"]`);
+
+            if (item.quantity === 0) {
+                if (cartItem) animateRemove(cartItem);
+                removeFromCartStorage(item.product_id);
+            } else {
+                if (cartItem) {
+                    cartItem.querySelector(".qty").innerText = item.quantity;
+                    cartItem.querySelector(".subtotal").innerText = "₹" + parseFloat(item.subtotal).toFixed(2);
+                }
+                setCartQuantity(item.product_id, item.quantity);
+            }
+            if (item.limited) {
+                showNotification('Not enough stock for that quantity', 'danger');
+            }
+            updateProductUI(item.product_id);
+        });
+
+        updateOrderSummary(data.total_qty, data.total_price);
+        updateCartBadge(data.cart_count);
+    }
+    catch (error) {
+        console.error(`Cart batch error : ${error}`);
+    }
+}
+
+// Sync the stored quantities of every product on the page with the server
+// in one request (the server's cart wins over localStorage)
+async function hydrateCartQuantities(roots = [document]) {
+    const cartLink = document.getElementById('cart-link');
+    if (!cartLink || !cartLink.dataset.qtyUrl) return;
+
+    const ids = new Set();
+    roots.forEach(root => {
+        if (root.dataset && root.dataset.productId) ids.add(root.dataset.productId);
+        root.querySelectorAll('[data-product-id]').forEach(el => ids.add(el.dataset.productId));
+    });
+    if (!ids.size) return;
+
+    try {
+        const response = await fetch(`${cartLink.dataset.qtyUrl}?ids=${[...ids].join(',')}`);
+        const data = await response.json();
+
+        ids.forEach(productId => {
+            setCartQuantity(productId, data.items[productId] || 0);
+            updateProductUI(productId);
+        });
+    }
+    catch (error) {
+        console.error(`Cart quantities fetch error : ${error}`);
+    }
+}
+
 // Load cart count
 async function loadCartCount() {
     const cart_count = document.getElementById("cart-count");
@@ -482,7 +506,15 @@ if (products_container) {
                 return;
             }
 
-            if (data.cart_count !== undefined) {
+            if (response.status === 409 && data.error === 'out_of_stock') {
+                // the server's stock wins over the count rendered into the page
+                product_card.dataset.stock = data.stock;
+                setCartQuantity(productId, Math.max(currentCartQty, data.stock));
+                showNotification(data.message, 'danger');
+                btn.innerHTML = '<i class="bi bi-cart-x"></i> Out of Stock';
+                btn.style.background = 'linear-gradient(135deg, #ff4081 0%, #ff5250 100%)';
+            }
+            else if (data.cart_count !== undefined) {
                 const cartBadge = document.getElementById('cart-count');
                 if (cartBadge) {
                     cartBadge.innerText = data.cart_count;
@@ -493,11 +525,11 @@ if (products_container) {
                 const newQty = currentCartQty + 1;
                 setCartQuantity(productId, newQty);
                 updateProductUI(productId);
-            }
 
-            // Success feedback
-            btn.innerHTML = '<i class="bi bi-check-lg"></i> Added!';
-            btn.style.background = 'linear-gradient(135deg, #00e676 0%, #00e676 100%)';
+                // Success feedback
+                btn.innerHTML = '<i class="bi bi-check-lg"></i> Added!';
+                btn.style.background = 'linear-gradient(135deg, #00e676 0%, #00e676 100%)';
+            }
 
         }
         catch (error) {
@@ -516,6 +548,67 @@ if (products_container) {
     });
 }
 
+/* =====================================================
+    PRODUCT LISTING - Infinite Scroll (keyset pages)
+    ===================================================== */
+
+function initLoadMore() {
+    const loadMoreBtn = document.getElementById('products-load-more');
+    const grid = document.getElementById('products-grid');
+    if (!loadMoreBtn || !grid || !loadMoreBtn.dataset.moreUrl) return;
+
+    let loading = false;
+
+    async function loadNextPage() {
+        const moreUrl = loadMoreBtn.dataset.moreUrl;
+        if (loading || !moreUrl) return;
+
+        loading = true;
+        loadMoreBtn.innerHTML = '<span class="loading"></span>';
+
+        try {
+            const response = await fetch(moreUrl);
+            const data = await response.json();
+
+            const before = grid.children.length;
+            grid.insertAdjacentHTML('beforeend', data.html);
+            initStockUI();
+            hydrateCartQuantities([...grid.children].slice(before));
+
+            if (data.has_next) {
+                loadMoreBtn.dataset.moreUrl = data.next_url;
+                loadMoreBtn.innerText = 'Load More';
+            } else {
+                observer && observer.disconnect();
+                loadMoreBtn.closest('#products-load-more-wrapper').remove();
+            }
+        }
+        catch (error) {
+            console.error(`Load more error : ${error}`);
+            loadMoreBtn.innerText = 'Load More';
+        }
+        finally {
+            loading = false;
+        }
+    }
+
+    loadMoreBtn.addEventListener('click', function (e) {
+        e.preventDefault();
+        loadNextPage();
+    });
+
+    // Auto-load when the button scrolls into view
+    const observer = 'IntersectionObserver' in window
+        ? new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) loadNextPage();
+        }, { rootMargin: '400px' })
+        : null;
+
+    if (observer) observer.observe(loadMoreBtn);
+}
+
+document.addEventListener('DOMContentLoaded', initLoadMore);
+
 /* =====================================================
     PRODUCT DETAIL - Add to Cart
     ===================================================== */
@@ -566,17 +659,24 @@ if (detailSection) {
                 return;
             }
 
-            if (data.cart_count !== undefined) {
+            if (response.status === 409 && data.error === 'out_of_stock') {
+                detailSection.dataset.stock = data.stock;
+                setCartQuantity(productId, Math.max(currentCartQty, data.stock));
+                showNotification(data.message, 'danger');
+                btn.innerHTML = '<i class="bi bi-cart-x"></i> Out of Stock';
+                btn.style.background = 'linear-gradient(135deg, #ff4081 0%, #ff5250 100%)';
+            }
+            else if (data.cart_count !== undefined) {
                 updateCartBadge(data.cart_count);
                 
                 // Update localStorage and UI
                 const newQty = currentCartQty + 1;
                 setCartQuantity(productId, newQty);
                 updateProductUI(productId);
-            }
 
-            btn.innerHTML = '<i class="bi bi-check-lg"></i> Added!';
-            btn.style.background = 'linear-gradient(135deg, #00e676 0%, #00e676 100%)';
+                btn.innerHTML = '<i class="bi bi-check-lg"></i> Added!';
+                btn.style.background = 'linear-gradient(135deg, #00e676 0%, #00e676 100%)';
+            }
         } catch (error) {
             console.error('Add to cart error:', error);
             btn.innerHTML = '<i class="bi bi-x-lg"></i> Error';
@@ -611,6 +711,56 @@ function initSearchEffects() {
     });
 }
 
+/* =====================================================
+    SEARCH SUGGESTIONS (autocomplete)
+    ===================================================== */
+
+function initSearchSuggestions() {
+    const input = document.querySelector('input[data-suggest-url]');
+    if (!input) return;
+
+    const datalist = document.getElementById(input.getAttribute('list'));
+    const suggestUrl = input.dataset.suggestUrl;
+    let timer = null;
+    let controller = null;
+
+    input.addEventListener('input', function () {
+        clearTimeout(timer);
+        const query = input.value.trim();
+
+        if (!query) {
+            datalist.innerHTML = '';
+            return;
+        }
+
+        timer = setTimeout(async () => {
+            if (controller) controller.abort();
+            controller = new AbortController();
+
+            try {
+                const response = await fetch(`${suggestUrl}?q=${encodeURIComponent(query)}`, {
+                    signal: controller.signal
+                });
+                const data = await response.json();
+
+                datalist.innerHTML = '';
+                data.results.forEach(item => {
+                    const option = document.createElement('option');
+                    option.value = item.title;
+                    datalist.appendChild(option);
+                });
+            }
+            catch (error) {
+                if (error.name !== 'AbortError') {
+                    console.error(`Suggest fetch error : ${error}`);
+                }
+            }
+        }, 150);
+    });
+}
+
+document.addEventListener('DOMContentLoaded', initSearchSuggestions);
+
 /* =====================================================
     ANIMATION UTILITIES
     ===================================================== */